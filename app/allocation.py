@@ -0,0 +1,74 @@
+import numpy as np
+
+GLIDE_PATHS = ("Step at retirement", "Linear to retirement", "Age in bonds", "Custom")
+REBALANCING = ("Monthly", "Annual", "Threshold", "Cost-aware")
+
+
+# --- Glide paths ---
+def parse_glide_points(text):
+    """(ages, stock %) from text like "50: 80, 65: 50, 85: 30", sorted by age."""
+    points = []
+    for item in text.replace(";", ",").split(","):
+        if not item.strip():
+            continue
+        age, sep, stock = item.partition(":")
+        if not sep:
+            raise ValueError(f"Glide path point '{item.strip()}' should be age: stock %")
+        points.append((float(age), float(stock)))
+    if not points:
+        raise ValueError("A custom glide path needs at least one age: stock % point")
+    ages, stocks = np.array(sorted(points)).T
+    if np.any((stocks < 0) | (stocks > 100)):
+        raise ValueError("Glide path stock allocations must be between 0 and 100")
+    return ages, stocks
+
+
+def glide_path(profile, dates, retire_month):
+    """Target stock fraction for every month of the schedule.
+
+    Step at retirement switches from the pre- to the post-retirement allocation in
+    retire_month; Linear to retirement moves between them evenly from today; Age in
+    bonds holds (age_in_bonds_base - age) % in stocks; Custom interpolates the
+    profile's age: stock % points, flat beyond the first and last.
+    """
+    months = len(dates)
+    index = np.arange(months)
+    pre = profile["stock_allocation_pre_retirement"]
+    post = profile["stock_allocation_post_retirement"]
+    age = (dates - np.datetime64(profile["birthday_self"], "D")).astype(float) / 365.25
+    name = profile["glide_path"]
+    if name == "Step at retirement":
+        stocks = np.where(index >= retire_month, post, pre)
+    elif name == "Linear to retirement":
+        stocks = pre + (post - pre) * np.minimum(index / max(retire_month, 1), 1)
+    elif name == "Age in bonds":
+        stocks = profile["age_in_bonds_base"] - age
+    elif name == "Custom":
+        stocks = np.interp(age, *parse_glide_points(profile["glide_custom"]))
+    else:
+        raise ValueError(f"Unknown glide path: {name}")
+    return np.clip(stocks, 0, 100) / 100
+
+
+# --- Rebalancing ---
+def rebalancing_schedule(profile, months):
+    """(months on which to check, drift band, tolerance kept after trading, cost per dollar traded).
+
+    Monthly and Annual trade back to target on their calendar; Threshold checks every
+    month but trades only once the stock weight drifts more than the band from
+    target; Cost-aware does the same but trades only back to the edge of the band.
+    Every trade pays the profile's trading cost.
+    """
+    name = profile["rebalancing"]
+    band = profile["rebalance_band"] / 100
+    if name == "Monthly":
+        check, band, tolerance = np.ones(months, dtype=bool), 0.0, 0.0
+    elif name == "Annual":
+        check, band, tolerance = np.arange(months) % 12 == 0, 0.0, 0.0
+    elif name == "Threshold":
+        check, tolerance = np.ones(months, dtype=bool), 0.0
+    elif name == "Cost-aware":
+        check, tolerance = np.ones(months, dtype=bool), band
+    else:
+        raise ValueError(f"Unknown rebalancing policy: {name}")
+    return check, band, tolerance, profile["trading_cost"] / 10000
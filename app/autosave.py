@@ -0,0 +1,69 @@
+import threading
+import time
+
+
+class Autosaver:
+    """Background, debounced profile uploads shared by every session in the process.
+
+    submit() only records the latest snapshot for a user; a worker thread uploads it
+    once no newer snapshot has arrived for `delay` seconds, so a burst of edits
+    becomes one write. Failed uploads are retried with exponential backoff unless a
+    newer snapshot has replaced them in the meantime.
+    """
+
+    def __init__(self, upload, delay=2.0, retries=3, backoff=2.0):
+        self.upload = upload  # upload(user_id, password, data), may raise
+        self.delay = delay
+        self.retries = retries
+        self.backoff = backoff
+        self._pending = {}  # user_id -> [due, password, data, attempt]
+        self._status = {}  # user_id -> (state, time, message)
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def submit(self, user_id, password, data):
+        with self._cond:
+            self._pending[user_id] = [time.monotonic() + self.delay, password, data, 0]
+            self._status[user_id] = ("pending", time.time(), None)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def status(self, user_id):
+        """(state, unix time, message) where state is pending, saving, saved, retrying or failed."""
+        return self._status.get(user_id)
+
+    def _next_due(self):
+        now = time.monotonic()
+        for user_id, job in self._pending.items():
+            if job[0] <= now:
+                return user_id, self._pending.pop(user_id)
+        return None, None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                user_id, job = self._next_due()
+                while job is None:
+                    wait = min((j[0] for j in self._pending.values()), default=None)
+                    self._cond.wait(None if wait is None else max(wait - time.monotonic(), 0))
+                    user_id, job = self._next_due()
+                self._status[user_id] = ("saving", time.time(), None)
+            _, password, data, attempt = job
+            try:
+                self.upload(user_id, password, data)
+            except Exception as e:
+                with self._cond:
+                    if user_id in self._pending:
+                        continue  # a newer snapshot supersedes the failed one
+                    if attempt + 1 < self.retries:
+                        retry_in = self.delay * self.backoff ** (attempt + 1)
+                        self._pending[user_id] = [time.monotonic() + retry_in, password, data, attempt + 1]
+                        self._status[user_id] = ("retrying", time.time(), str(e))
+                    else:
+                        self._status[user_id] = ("failed", time.time(), str(e))
+            else:
+                with self._cond:
+                    if user_id not in self._pending:
+                        self._status[user_id] = ("saved", time.time(), None)
@@ -0,0 +1,61 @@
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("PROFILE_CACHE_MAX_ENTRIES", 1000))
+DEFAULT_MAX_BYTES = int(os.environ.get("PROFILE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+
+class CachedBlob:
+    """An encrypted object body with the ETag and metadata it was fetched with."""
+
+    def __init__(self, etag, body, metadata):
+        self.etag = etag
+        self.body = body
+        self.metadata = metadata
+
+
+class BlobCache:
+    """Node-local LRU of encrypted profile blobs, bounded by entry count and total bytes.
+
+    Only ciphertext is held; decrypting still needs the user's password.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is not None:
+                self._entries.move_to_end(key)
+            return blob
+
+    def put(self, key, etag, body, metadata):
+        if not etag or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= len(self._entries.pop(key).body)
+            self._entries[key] = CachedBlob(etag, body, metadata)
+            self.nbytes += len(body)
+            while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= len(evicted.body)
+
+    def discard(self, key):
+        with self._lock:
+            blob = self._entries.pop(key, None)
+            if blob is not None:
+                self.nbytes -= len(blob.body)
+
+
+# Shared by every session in this process
+profile_blobs = BlobCache()
@@ -0,0 +1,182 @@
+import datetime
+
+import numpy as np
+
+from engine import INFLATION, CashFlowPlan, ages_on_dates, build_plan, horizon_months, month_dates, simulate
+from scenarios import profile_rates
+from spending import spending_policy
+from taxes import SOCIAL_SECURITY_TAXABLE
+
+# Claiming ages searched, in months: every month from 62 to 70
+CLAIM_AGES = np.arange(62 * 12, 70 * 12 + 1)
+PEOPLE = ("self", "spouse")
+OBJECTIVES = ("Success rate", "Median terminal value")
+
+
+# --- Benefit rules ---
+def full_retirement_age(birth_year):
+    """Social Security full retirement age in months for a birth year."""
+    if birth_year <= 1937:
+        return 65 * 12
+    if birth_year <= 1942:
+        return 65 * 12 + 2 * (birth_year - 1937)
+    if birth_year <= 1954:
+        return 66 * 12
+    if birth_year <= 1959:
+        return 66 * 12 + 2 * (birth_year - 1954)
+    return 67 * 12
+
+
+def claiming_factor(claim_age, fra):
+    """Benefit as a fraction of the full-retirement-age amount when claiming at claim_age months.
+
+    Early claims lose 5/9% a month for the first 36 months and 5/12% a month beyond;
+    delayed claims gain 2/3% a month (8% a year) up to age 70.
+    """
+    early = np.maximum(fra - claim_age, 0)
+    late = np.maximum(claim_age - fra, 0)
+    return 1 - np.minimum(early, 36) * 5 / 900 - np.maximum(early - 36, 0) * 5 / 1200 + late * 2 / 300
+
+
+def add_months(date, months):
+    year, month = divmod(date.month - 1 + int(months), 12)
+    return datetime.date(date.year + year, month + 1, min(date.day, 28))
+
+
+class ClaimingResult:
+    """Success rate and median terminal value over a grid of claiming ages for both spouses."""
+
+    def __init__(self, ages_self, ages_spouse, dates_self, dates_spouse, benefit_self, benefit_spouse,
+                 success, median, objective, current):
+        self.ages_self = ages_self  # claiming ages in months, one per grid row
+        self.ages_spouse = ages_spouse  # ... and per grid column
+        self.dates_self = dates_self
+        self.dates_spouse = dates_spouse
+        self.benefit_self = benefit_self  # monthly benefit at each claiming age
+        self.benefit_spouse = benefit_spouse
+        self.success = success
+        self.median = median
+        self.objective = objective
+        self.current = current  # grid cell of the profile's own claiming dates, if on the grid
+
+    @property
+    def best(self):
+        """Grid cell maximising the objective, ties broken by the other measure."""
+        primary, secondary = ((self.success, self.median) if self.objective == OBJECTIVES[0]
+                              else (self.median, self.success))
+        order = np.lexsort((secondary.ravel(), primary.ravel()))
+        return np.unravel_index(order[-1], primary.shape)
+
+    def describe(self, cell):
+        i, j = cell
+        return {
+            "Claim age (self)": f"{self.ages_self[i] // 12}y {self.ages_self[i] % 12}m",
+            "Claim date (self)": self.dates_self[i],
+            "Benefit (self)": round(float(self.benefit_self[i])),
+            "Claim age (spouse)": f"{self.ages_spouse[j] // 12}y {self.ages_spouse[j] % 12}m",
+            "Claim date (spouse)": self.dates_spouse[j],
+            "Benefit (spouse)": round(float(self.benefit_spouse[j])),
+            "Success rate": float(self.success[i, j]),
+            "Median terminal value": float(self.median[i, j]),
+        }
+
+
+def claim_options(profile, person, today):
+    """Claiming ages, dates and monthly benefits still open to one person.
+
+    The entered benefit is taken as the full-retirement-age amount. Someone with no
+    benefit, or past every claiming age, keeps the date and amount they entered; a
+    single filer's spouse has none.
+    """
+    birthday = profile[f"birthday_{person}"]
+    benefit = float(profile[f"socsec_income_{person}"]) if person == "self" or profile["has_spouse"] else 0.0
+    dates = [add_months(birthday, age) for age in CLAIM_AGES]
+    open_ = np.array([d >= today for d in dates])
+    if benefit == 0 or not open_.any():
+        date = profile[f"socsec_date_{person}"]
+        age = (date.year - birthday.year) * 12 + date.month - birthday.month
+        return np.array([age]), [date], np.array([benefit])
+    ages = CLAIM_AGES[open_]
+    factors = claiming_factor(ages, full_retirement_age(birthday.year))
+    return ages, [d for d, o in zip(dates, open_) if o], benefit * factors
+
+
+def optimize_claiming(store, stats, profile, objective=OBJECTIVES[0], today=None, max_batch=2_000_000,
+                      progress=None):
+    """Evaluate every pair of claiming months for both spouses against shared rate paths.
+
+    The schedule without Social Security is built once; each person's benefit stream
+    for every claiming month is one row of an array, and their sum over the grid
+    broadcasts against the rate paths, so a whole block of the grid runs as one
+    final-month-only simulate() call. Blocks hold at most max_batch paths. Months
+    before the first possible claim are common to every cell and simulated once.
+    progress(fraction) is called after each block. Other household members keep the
+    claiming dates they entered.
+    """
+    today = today or datetime.date.today()
+    months = horizon_months(profile, today)
+    dates = month_dates(months, today)
+    base = build_plan(dict(profile, socsec_income_self=0, socsec_income_spouse=0), dates)
+    rates = profile_rates(store, stats, profile, months)
+
+    options, streams = {}, {}
+    for person in PEOPLE:
+        ages, claim_dates, benefits = claim_options(profile, person, today)
+        alive = ages_on_dates(profile[f"birthday_{person}"], dates) < profile[f"life_expectancy_{person}"]
+        start = np.searchsorted(dates, np.array(claim_dates, dtype="datetime64[D]"))
+        claimed = np.arange(months) >= start[:, None]
+        options[person] = (ages, claim_dates, benefits)
+        streams[person] = np.where(claimed & alive, benefits[:, None], 0)
+
+    # Every combination is identical until the first possible claim, so run that stretch
+    # once and start the grid from its balances (in nominal dollars). Policies that
+    # carry state between months, portfolios allowed to drift from target and
+    # tax-aware accounts have to see the whole run.
+    first = min(int(np.argmax(stream.any(axis=0))) if stream.any() else months for stream in streams.values())
+    first = max(min(first - 1, months - 1), 0)  # the claim month itself differs
+    if spending_policy(profile).stateful or profile["rebalancing"] != "Monthly" or base.tax is not None:
+        first = 0
+    initial_investment, initial_cash, deflator, price_level = base.initial_investment, base.initial_cash, 1.0, 1.0
+    if first > 0:
+        prefix = simulate(base, rates[:, :first + 1], policy=spending_policy(profile))
+        inflation = np.cumprod(1 + rates[:, :first + 1, INFLATION], axis=1)
+        initial_investment = prefix.investment[:, first] * inflation[:, first]
+        initial_cash = prefix.cash[:, first] * inflation[:, first]
+        deflator = 1 / inflation[:, first - 1]  # the remainder discounts from month `first` on
+        price_level = inflation[:, first - 1, None]  # ... and grows inflation-linked events from there
+    tail = slice(first, None)
+
+    n_self, n_spouse = len(options["self"][0]), len(options["spouse"][0])
+    success = np.zeros((n_self, n_spouse))
+    median = np.zeros((n_self, n_spouse))
+    rows_per_block = max(max_batch // max(n_spouse * len(rates), 1), 1)
+    for lo in range(0, n_self, rows_per_block):
+        hi = min(lo + rows_per_block, n_self)
+        benefits = streams["self"][lo:hi, None, tail] + streams["spouse"][None, :, tail]
+        income = base.retire_income[tail] + benefits
+        taxable_income = base.taxable_income[tail] + SOCIAL_SECURITY_TAXABLE * benefits
+        plan = CashFlowPlan(dates[tail], base.ages[:, tail], base.contributions[tail],
+                            income[:, :, None, :], base.need_spend[tail], base.assisted_spend[tail],
+                            base.luxury_spend[tail], base.stock_allocation[tail], initial_investment,
+                            initial_cash, base.cash_set_point, base.rebalance[tail], base.rebalance_band,
+                            base.rebalance_tolerance, base.trading_cost, base.events[tail],
+                            base.events_real[tail] * price_level, base.tax, taxable_income[:, :, None, :],
+                            base.rmd_rate[tail], base.initial_deferred, base.initial_roth)
+        if months:
+            finals = simulate(plan, rates[:, tail], final_only=True,
+                              policy=spending_policy(profile)).total[..., 0] * deflator
+        else:
+            finals = np.zeros((hi - lo, n_spouse, 1))
+        success[lo:hi] = (finals > 0).mean(axis=-1)
+        median[lo:hi] = np.median(finals, axis=-1)
+        if progress is not None:
+            progress(hi / n_self)
+
+    current = []
+    for person in PEOPLE:
+        birthday, date = profile[f"birthday_{person}"], profile[f"socsec_date_{person}"]
+        match = np.flatnonzero(options[person][0] == (date.year - birthday.year) * 12 + date.month - birthday.month)
+        current.append(int(match[0]) if len(match) else None)
+    return ClaimingResult(options["self"][0], options["spouse"][0], options["self"][1], options["spouse"][1],
+                          options["self"][2], options["spouse"][2], success, median, objective,
+                          tuple(current) if None not in current else None)
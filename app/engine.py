@@ -0,0 +1,517 @@
+import copy
+import datetime
+import numpy as np
+
+from allocation import glide_path, rebalancing_schedule
+from events import event_flows
+from household import household
+from taxes import DEFERRED, ROTH, SOCIAL_SECURITY_TAXABLE, TAXABLE, rmd_rates, tax_rules
+
+# Last axis of every rate tensor, in rate_store.RATE_COLUMNS order
+STOCKS, BONDS, CASH, INFLATION = range(4)
+
+
+# --- Time Setup ---
+def horizon_months(profile, today=None):
+    """Months from today until the latest expected death in the household."""
+    today = today or datetime.date.today()
+    people = household(profile)
+    end_year = people.birthday.astype("datetime64[Y]").astype(int) + 1970 + people.life_expectancy.astype(int)
+    end_month = people.birthday.astype("datetime64[M]").astype(int) % 12 + 1
+    return max(int(np.max((end_year - today.year) * 12 + end_month - today.month)), 0)
+
+
+def month_dates(months, today=None):
+    """Calculation dates, one every 30 days starting today."""
+    today = np.datetime64(today or datetime.date.today(), "D")
+    return today + 30 * np.arange(months)
+
+
+def ages_on_dates(birthdate, dates):
+    return (dates - np.datetime64(birthdate, "D")).astype(int) // 365
+
+
+# --- Cash-flow schedule ---
+class CashFlowPlan:
+    """Deterministic monthly schedule of one profile's income and spending."""
+
+    def __init__(self, dates, ages, contributions, retire_income, need_spend,
+                 assisted_spend, luxury_spend, stock_allocation, initial_investment,
+                 initial_cash, cash_set_point, rebalance=None, rebalance_band=0.0,
+                 rebalance_tolerance=0.0, trading_cost=0.0, events=None, events_real=None, tax=None,
+                 taxable_income=None, rmd_rate=None, initial_deferred=0.0, initial_roth=0.0):
+        self.dates = dates
+        self.ages = ages  # (people, months), for reporting; None once plans are stacked
+        self.contributions = contributions
+        self.retire_income = retire_income
+        self.need_spend = need_spend
+        self.assisted_spend = assisted_spend
+        self.luxury_spend = luxury_spend  # paid only in months where stocks beat inflation
+        self.stock_allocation = stock_allocation  # target stock fraction each month
+        # Months on which the stock weight is checked against target (default: every
+        # month), the drift allowed before trading, how far from target a trade stops,
+        # and the cost per dollar traded (see allocation.py)
+        self.rebalance = np.ones(len(dates), dtype=bool) if rebalance is None else rebalance
+        self.rebalance_band = rebalance_band
+        self.rebalance_tolerance = rebalance_tolerance
+        self.trading_cost = trading_cost
+        # One-off and time-bounded net flows (see events.py): nominal, and in today's
+        # dollars to be grown with each path's inflation
+        self.events = np.zeros(len(dates)) if events is None else events
+        self.events_real = np.zeros(len(dates)) if events_real is None else events_real
+        self.initial_investment = initial_investment
+        self.initial_cash = initial_cash
+        self.cash_set_point = cash_set_point
+        # Tax-aware accounts (see taxes.py): None keeps one untaxed investment pool.
+        # Otherwise the initial investment splits into taxable, tax-deferred and Roth
+        # buckets, retire_income is taxed as taxable_income, and rmd_rate is the share
+        # of the tax-deferred balance that must be distributed each month
+        self.tax = tax
+        self.taxable_income = np.zeros(len(dates)) if taxable_income is None else taxable_income
+        self.rmd_rate = np.zeros(len(dates)) if rmd_rate is None else rmd_rate
+        self.initial_deferred = initial_deferred
+        self.initial_roth = initial_roth
+
+    @property
+    def months(self):
+        return len(self.dates)
+
+
+def build_plan(profile, dates, deaths=None):
+    """Build the cash-flow schedule for a profile with array operations over all months.
+
+    Every member's inputs lie along a people axis (see household.py), so each flow is
+    one (people, months) grid summed over that axis, whatever the household's size.
+    deaths optionally holds a sampled date of death per member and path, shaped
+    (people, n_paths) (see longevity.py). Flows are then masked by a (people, n_paths,
+    months) alive grid instead of the fixed life expectancies, household spending
+    stops once everyone has died, and the schedule has one row per path.
+    """
+    months = len(dates)
+    index = np.arange(months)
+    people = household(profile)
+    ages = people.ages(dates)
+
+    def month_index(date):
+        return np.searchsorted(dates, np.asarray(date, dtype="datetime64[D]"))
+
+    if deaths is None:
+        alive = ages < people.life_expectancy[:, None]
+        in_care = (ages >= people.assisted_age[:, None]) & (ages <= people.life_expectancy[:, None])
+        anyone_alive = np.ones(months, dtype=bool)
+    else:
+        alive = dates < np.asarray(deaths)[:, :, None]
+        in_care = (ages[:, None] >= people.assisted_age[:, None, None]) & alive
+        anyone_alive = alive.any(axis=0)
+
+    def per_member(values):
+        """Member values lined up against the (people, ..., months) grids."""
+        return values.reshape((len(people),) + (1,) * (alive.ndim - 1))
+
+    contributions = np.where(alive & (index < per_member(month_index(people.retire_date))),
+                             per_member(people.contribution), 0).sum(axis=0)
+    pension = np.where(alive & (index >= per_member(month_index(people.pension_date))), per_member(people.pension), 0)
+    socsec = np.where(alive & (index >= per_member(month_index(people.socsec_date))), per_member(people.socsec), 0)
+    retire_income = (pension + socsec).sum(axis=0)
+    taxable_income = (pension + SOCIAL_SECURITY_TAXABLE * socsec).sum(axis=0)
+    assisted_spend = np.where(in_care, profile["retire_assisted"], 0).sum(axis=0)
+
+    retire_month = month_index(people.retirement)
+    rebalance, band, tolerance, trading_cost = rebalancing_schedule(profile, months)
+    events, events_real = event_flows(profile["cash_events"], dates)
+    tax = tax_rules(profile)
+    investment = float(profile["current_investment"])
+
+    return CashFlowPlan(
+        dates=dates,
+        ages=ages,
+        contributions=contributions,
+        retire_income=retire_income,
+        need_spend=np.where(anyone_alive, float(profile["retire_need_spend"]), 0),
+        assisted_spend=assisted_spend,
+        luxury_spend=np.where(anyone_alive, float(profile["retire_luxury_spend"]), 0),
+        stock_allocation=glide_path(profile, dates, retire_month),
+        initial_investment=investment,
+        initial_cash=float(profile["current_cash"]),
+        cash_set_point=float(profile["cash_set_point"]),
+        rebalance=rebalance,
+        rebalance_band=band,
+        rebalance_tolerance=tolerance,
+        trading_cost=trading_cost,
+        events=events,
+        events_real=events_real,
+        tax=tax,
+        taxable_income=taxable_income,
+        # The tax-deferred account is taken to be self's for distributions
+        rmd_rate=rmd_rates(profile["birthday_self"], ages[0]),
+        initial_deferred=investment * profile["deferred_pct"] / 100 if tax else 0.0,
+        initial_roth=investment * profile["roth_pct"] / 100 if tax else 0.0,
+    )
+
+
+def stack_plans(plans, repeats=None, months=None):
+    """Combine several profiles' plans so they can share a single simulate() call.
+
+    With repeats, plan i fills repeats[i] consecutive paths (one rate path each).
+    Without, the result has a leading plan axis of shape (n_plans, 1), so every plan
+    is run against every rate path. Shorter horizons are padded to `months`
+    (default: the longest) with no cash flows and their last allocation.
+    """
+    months = max(p.months for p in plans) if months is None else months
+    if len({None if p.tax is None else p.tax.key for p in plans}) > 1:
+        raise ValueError("Stacked plans must share their tax settings")
+
+    def pad(values, mode="constant"):
+        values = np.asarray(values)[:months]
+        if mode == "edge" and len(values) == 0:
+            return np.zeros(months)
+        return np.pad(values, (0, months - len(values)), mode=mode)
+
+    def per_path(field, mode="constant"):
+        stacked = np.stack([pad(getattr(p, field), mode) for p in plans])
+        return stacked[:, None] if repeats is None else np.repeat(stacked, repeats, axis=0)
+
+    def scalar(field):
+        values = np.array([getattr(p, field) for p in plans])
+        return values[:, None] if repeats is None else np.repeat(values, repeats)
+
+    dates = plans[0].dates[0] + 30 * np.arange(months) if plans[0].months else month_dates(months)
+    return CashFlowPlan(
+        dates=dates,
+        ages=None,
+        contributions=per_path("contributions"),
+        retire_income=per_path("retire_income"),
+        need_spend=per_path("need_spend"),
+        assisted_spend=per_path("assisted_spend"),
+        luxury_spend=per_path("luxury_spend"),
+        stock_allocation=per_path("stock_allocation", "edge"),
+        initial_investment=scalar("initial_investment"),
+        initial_cash=scalar("initial_cash"),
+        cash_set_point=scalar("cash_set_point"),
+        rebalance=per_path("rebalance"),
+        rebalance_band=scalar("rebalance_band"),
+        rebalance_tolerance=scalar("rebalance_tolerance"),
+        trading_cost=scalar("trading_cost"),
+        events=per_path("events"),
+        events_real=per_path("events_real"),
+        tax=plans[0].tax,
+        taxable_income=per_path("taxable_income"),
+        rmd_rate=per_path("rmd_rate"),
+        initial_deferred=scalar("initial_deferred"),
+        initial_roth=scalar("initial_roth"),
+    )
+
+
+def plan_paths(plan, rows, n_paths):
+    """The plan for some of its paths, when it has one schedule per path (e.g. sampled lifetimes).
+
+    rows is a slice or index array into the n_paths paths; schedules shared by
+    every path are kept as they are.
+    """
+    part = copy.copy(plan)
+    for name, value in vars(plan).items():
+        if name not in ("dates", "ages") and np.ndim(value) >= 2 and np.shape(value)[0] == n_paths:
+            setattr(part, name, value[rows])
+    return part
+
+
+# --- Balance recursion ---
+class PathResults:
+    """Per-path balances (today's dollars) and flows from one batched run.
+
+    index holds the month of each column; None means every month.
+    """
+
+    def __init__(self, investment, cash, spend, income, index=None):
+        self.investment = investment
+        self.cash = cash
+        self.spend = spend
+        self.income = income
+        self.index = index
+
+    @property
+    def total(self):
+        return self.investment + self.cash
+
+    def __len__(self):
+        return len(self.investment)
+
+
+def batch_shape(plan, rates):
+    """Leading axes of a run: the plan's batch axes broadcast against the rate paths'."""
+    monthly = (plan.contributions, plan.retire_income, plan.need_spend, plan.assisted_spend,
+               plan.luxury_spend, plan.stock_allocation, plan.rebalance, plan.events, plan.events_real,
+               plan.taxable_income, plan.rmd_rate)
+    scalars = (plan.initial_investment, plan.initial_cash, plan.cash_set_point, plan.rebalance_band,
+               plan.rebalance_tolerance, plan.trading_cost, plan.initial_deferred, plan.initial_roth)
+    return np.broadcast_shapes(rates.shape[:-2], *(np.shape(a)[:-1] for a in monthly),
+                               *(np.shape(a) for a in scalars))
+
+
+def simulate(plan, rates, final_only=False, policy=None, store_dtype=np.float64):
+    """Run every scenario in rates (..., months, 4) through the plan in one pass.
+
+    The month-to-month recursion is sequential, but each step is a handful of array
+    operations across all paths, so the cost barely grows with the number of paths.
+    rates may be any strided view; it is only read one month at a time. The plan may
+    be a single profile's schedule or a batch from stack_plans(); its leading axes
+    broadcast against the rate paths'. With final_only, only the last month is kept,
+    so very large batches need no per-month storage. policy (see spending.py) decides
+    the luxury spend; by default it is paid in months where stocks beat inflation.
+
+    Investments start at the month-0 target allocation and drift with returns; on the
+    plan's rebalancing months, a stock weight more than rebalance_band from target is
+    traded back to within rebalance_tolerance of it, paying trading_cost on both sides.
+    Glide path and schedule are plan arrays, so every strategy runs the same steps.
+    Nominal events are folded into the flows up front; inflation-linked ones are
+    scaled by each path's price level as it accrues.
+
+    With tax-aware accounts, each month's required distribution leaves the tax-deferred
+    bucket first and the month's ordinary income is taxed at the annualised federal
+    rate (brackets in today's dollars, indexed by each path's inflation). Whatever
+    cash can't cover is withdrawn from the buckets in the plan's order, grossed up
+    for the tax it owes: the marginal rate for tax-deferred money, the gains tax for
+    taxable money, nothing for Roth. The taxes are part of the month's spend.
+
+    The recursion always runs in float64; store_dtype is the type of the stored
+    per-month arrays (float32 halves a large batch's memory, see simulate_float32).
+    """
+    months = rates.shape[-2]
+    batch = batch_shape(plan, rates)
+    if months == 0:
+        empty = np.zeros(batch + (0,), dtype=store_dtype)
+        return PathResults(empty, empty, empty, empty, index=np.arange(0) if final_only else None)
+
+    flows_in = plan.retire_income + plan.contributions + np.maximum(plan.events, 0)
+    flows_out = plan.need_spend + plan.assisted_spend + np.maximum(-plan.events, 0)
+    linked_events = np.any(plan.events_real)
+    tax = plan.tax
+    price_level = 1 + rates[..., 0, INFLATION]
+    set_point = plan.cash_set_point
+    band, tolerance, cost = plan.rebalance_band, plan.rebalance_tolerance, plan.trading_cost
+
+    investment_now = np.broadcast_to(np.asarray(plan.initial_investment, dtype=float), batch).copy()
+    cash_now = np.broadcast_to(np.asarray(plan.initial_cash, dtype=float), batch).copy()
+    spend_now = np.zeros(batch)
+    income_now = np.zeros(batch)
+    weight_now = np.broadcast_to(plan.stock_allocation[..., 0], batch)
+    if tax is not None:
+        buckets = [None] * 3
+        buckets[DEFERRED] = np.broadcast_to(np.asarray(plan.initial_deferred, dtype=float), batch).copy()
+        buckets[ROTH] = np.broadcast_to(np.asarray(plan.initial_roth, dtype=float), batch).copy()
+        buckets[TAXABLE] = investment_now - buckets[DEFERRED] - buckets[ROTH]
+    if policy is None:
+        luxury = rates[..., STOCKS] > rates[..., INFLATION]
+    else:
+        policy.start(plan, investment_now + cash_now)
+    if not final_only:
+        investment = np.zeros(batch + (months,), dtype=store_dtype)
+        cash = np.zeros(batch + (months,), dtype=store_dtype)
+        spend = np.zeros(batch + (months,), dtype=store_dtype)
+        income = np.zeros(batch + (months,), dtype=store_dtype)
+        investment[..., 0] = investment_now
+        cash[..., 0] = cash_now
+    for i in range(1, months):
+        if policy is None:
+            discretionary = np.where(luxury[..., i], plan.luxury_spend[..., i], 0)
+        else:
+            discretionary = policy.discretionary(i, plan, investment_now + cash_now, rates[..., i, :])
+        spend_now = flows_out[..., i] + discretionary
+        income_now = flows_in[..., i]
+        if linked_events or tax is not None:
+            price_level = price_level * (1 + rates[..., i, INFLATION])
+        if linked_events:
+            event = plan.events_real[..., i] * price_level
+            spend_now = spend_now + np.maximum(-event, 0)
+            income_now = income_now + np.maximum(event, 0)
+        if tax is not None:
+            rmd = buckets[DEFERRED] * plan.rmd_rate[..., i]
+            buckets[DEFERRED] = buckets[DEFERRED] - rmd
+            ordinary = plan.taxable_income[..., i] + rmd
+            spend_now = spend_now + tax.monthly_tax(ordinary, price_level)
+            net = income_now + rmd - spend_now
+        else:
+            net = income_now - spend_now
+
+        # Surplus goes to cash; a deficit is drawn from cash first, then investments
+        deficit = np.maximum(-net, 0)
+        cash_used = np.minimum(cash_now, deficit)
+        new_cash = cash_now + np.maximum(net, 0) - cash_used
+        if tax is None:
+            total_invest = np.maximum(investment_now - (deficit - cash_used), 0)
+
+            # Top cash back up to the set point from investments
+            transfer = np.where((new_cash < set_point) & (total_invest > 0),
+                                np.minimum(set_point - new_cash, total_invest), 0)
+            new_cash += transfer
+            total_invest -= transfer
+        else:
+            # The deficit and the cash top-up come from the buckets in order, each
+            # dollar grossed up for the tax it owes
+            shortfall = deficit - cash_used
+            wanted = shortfall + np.maximum(set_point - new_cash, 0)
+            remaining, withdrawal_tax = wanted, 0
+            marginal = tax.marginal(ordinary, price_level)
+            for b in tax.order:
+                kept = 1 - (marginal if b == DEFERRED else tax.gains_tax if b == TAXABLE else 0)
+                taken = np.minimum(buckets[b], remaining / kept)
+                buckets[b] = buckets[b] - taken
+                remaining = remaining - taken * kept
+                withdrawal_tax = withdrawal_tax + taken * (1 - kept)
+            new_cash = new_cash + np.maximum(wanted - remaining - shortfall, 0)
+            spend_now = spend_now + withdrawal_tax
+            total_invest = buckets[TAXABLE] + buckets[DEFERRED] + buckets[ROTH]
+
+        # Rebalance toward this month's target if due, then apply this month's returns
+        # (withdrawals come out of stocks and bonds in proportion, keeping the weight)
+        target = plan.stock_allocation[..., i]
+        due = plan.rebalance[..., i] & (np.abs(weight_now - target) > band)
+        ratio = np.where(due, np.clip(weight_now, target - tolerance, target + tolerance), weight_now)
+        after_costs = 1 - 2 * cost * np.abs(ratio - weight_now)
+        total_invest = total_invest * after_costs
+        stock_growth = ratio * (1 + rates[..., i, STOCKS])
+        growth = stock_growth + (1 - ratio) * (1 + rates[..., i, BONDS])
+        investment_now = total_invest * growth
+        if tax is not None:  # every bucket holds the same mix
+            buckets = [bucket * after_costs * growth for bucket in buckets]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight_now = np.where(growth > 0, stock_growth / growth, ratio)
+        cash_now = new_cash * (1 + rates[..., i, CASH])
+        if not final_only:
+            investment[..., i] = investment_now
+            cash[..., i] = cash_now
+            spend[..., i] = spend_now
+            income[..., i] = income_now
+
+    # --- Adjust all to today's dollars (real dollars)
+    if final_only:
+        discount = 1 / np.prod(1 + rates[..., INFLATION], axis=-1)
+        final = [np.broadcast_to(values, batch)[..., None]
+                 for values in (investment_now * discount, cash_now * discount, spend_now, income_now)]
+        return PathResults(*final, index=np.array([months - 1]))
+    discount_factors = 1 / np.cumprod(1 + rates[..., INFLATION], axis=-1)
+    investment *= discount_factors
+    cash *= discount_factors
+    return PathResults(investment, cash, spend, income)
+
+
+# --- Float32 storage ---
+ENGINE_PRECISIONS = ("Float64", "Float32")
+# Documented accuracy of simulate_float32() against simulate(): every stored value and
+# total, so every terminal value and p10/median/p90 band, agrees within FLOAT32_ATOL
+# dollars plus FLOAT32_RTOL of the value (checked by tools/check_float32.py).
+FLOAT32_ATOL = 1.0
+FLOAT32_RTOL = 1e-6
+
+
+def float32_within_tolerance(results):
+    """Whether rounding to float32 provably kept a run's stored values within tolerance.
+
+    Storing a float64 value in float32 moves it by at most half an ulp, eps/2 of
+    itself, which is well inside FLOAT32_RTOL for any finite value. A total adds a
+    second rounding and, where cash is negative, the investment's and cash's errors
+    are relative to their own sizes rather than the total's, so the total's error is
+    bounded from the stored values and compared with the tolerance. Infinite or NaN
+    values fail the comparison.
+    """
+    half_ulp = np.finfo(np.float32).eps / 2
+    for values in (results.spend, results.income):
+        if not np.isfinite(values).all():
+            return False
+    # In place, so the check needs little more memory than the float32 results themselves
+    total = np.abs(results.total)
+    error = np.abs(results.investment)
+    error += np.abs(results.cash)
+    error += total
+    error *= half_ulp
+    allowed = total
+    allowed -= error
+    allowed *= FLOAT32_RTOL
+    allowed += FLOAT32_ATOL
+    return bool(np.all(error <= allowed))
+
+
+def simulate_float32(plan, rates, policy=None):
+    """simulate() with its per-month results stored in float32, in half the memory.
+
+    This is a storage precision: balances, rebalancing, taxes and spending decisions
+    are all computed in float64, exactly as by simulate(), and only the stored values
+    are rounded. Rounding keeps values in order, so percentile bands move no further
+    than the values themselves. If the rounding error can't be shown to be within
+    FLOAT32_ATOL + FLOAT32_RTOL (see float32_within_tolerance), the batch is rerun
+    and stored in float64. Returns the PathResults and the precision used.
+    """
+    with np.errstate(over="ignore", invalid="ignore"):  # values beyond float32 become inf and fail the check
+        results = simulate(plan, rates, policy=policy, store_dtype=np.float32)
+        fits = float32_within_tolerance(results)
+    if fits:
+        return results, "Float32"
+    return simulate(plan, rates, policy=policy), "Float64"
+
+
+# --- Annual preview ---
+# Documented accuracy of simulate_annual against simulate: at every yearly point the
+# p10, median and p90 totals agree within this fraction of the starting balance,
+# out to the longest supported horizon (checked by tools/check_annual_preview.py).
+ANNUAL_TOLERANCE = 0.025
+
+
+def simulate_annual(plan, rates):
+    """Coarse preview of simulate() that steps once per year instead of once per month.
+
+    Each year's cash flows (including months where luxury spend triggers) are summed
+    and settled once at mid-year; the year's investment and cash growth is the product
+    of its monthly factors under the monthly allocation. Balances are reported at
+    months 0, 12, 24, ... and the final month.
+    """
+    n_paths, months = rates.shape[:2]
+    if months == 0:
+        empty = np.zeros((n_paths, 0))
+        return PathResults(empty, empty, empty, empty, index=np.arange(0))
+
+    # Year b covers months [starts[b], ends[b]]; month 0 is the starting balance
+    starts = np.arange(1, months, 12)
+    ends = np.minimum(starts + 11, months - 1)
+    index = np.r_[0, ends]
+
+    luxury = np.where(rates[:, :, STOCKS] > rates[:, :, INFLATION], plan.luxury_spend, 0)
+    events = plan.events + plan.events_real * np.cumprod(1 + rates[:, :, INFLATION], axis=1)
+    spend_monthly = plan.need_spend + plan.assisted_spend + luxury + np.maximum(-events, 0)
+    income_monthly = plan.retire_income + plan.contributions + np.maximum(events, 0)
+    invest_growth = (plan.stock_allocation * (1 + rates[:, :, STOCKS])
+                     + (1 - plan.stock_allocation) * (1 + rates[:, :, BONDS]))
+    cash_growth = 1 + rates[:, :, CASH]
+
+    spend = np.add.reduceat(spend_monthly[:, 1:], starts - 1, axis=1) if len(starts) else np.zeros((n_paths, 0))
+    income = np.add.reduceat(income_monthly[:, 1:], starts - 1, axis=1) if len(starts) else np.zeros((n_paths, 0))
+    invest_growth = np.multiply.reduceat(invest_growth[:, 1:], starts - 1, axis=1) if len(starts) else spend
+    cash_growth = np.multiply.reduceat(cash_growth[:, 1:], starts - 1, axis=1) if len(starts) else spend
+
+    investment = np.zeros((n_paths, len(index)))
+    cash = np.zeros((n_paths, len(index)))
+    investment[:, 0] = plan.initial_investment
+    cash[:, 0] = plan.initial_cash
+    # Flows are spread through the year, so settle them at mid-year: half the year's
+    # growth before, half after
+    invest_half, cash_half = np.sqrt(invest_growth), np.sqrt(cash_growth)
+    set_point = plan.cash_set_point
+    for b in range(len(starts)):
+        net = income[:, b] - spend[:, b]
+        held_cash = cash[:, b] * cash_half[:, b]
+        deficit = np.maximum(-net, 0)
+        cash_used = np.minimum(held_cash, deficit)
+        new_cash = held_cash + np.maximum(net, 0) - cash_used
+        total_invest = np.maximum(investment[:, b] * invest_half[:, b] - (deficit - cash_used), 0)
+        transfer = np.where((new_cash < set_point) & (total_invest > 0),
+                            np.minimum(set_point - new_cash, total_invest), 0)
+        investment[:, b + 1] = (total_invest - transfer) * invest_half[:, b]
+        cash[:, b + 1] = (new_cash + transfer) * cash_half[:, b]
+
+    discount_factors = 1 / np.cumprod(1 + rates[:, :, INFLATION], axis=1)[:, index]
+    investment *= discount_factors
+    cash *= discount_factors
+    flows = np.zeros((n_paths, len(index)))
+    spend_out, income_out = flows.copy(), flows.copy()
+    spend_out[:, 1:] = spend
+    income_out[:, 1:] = income
+    return PathResults(investment, cash, spend_out, income_out, index=index)
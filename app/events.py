@@ -0,0 +1,66 @@
+import datetime
+
+import numpy as np
+
+# One row of the profile's cash_events list; dates are ISO strings so it saves as JSON
+EVENT_FIELDS = ("name", "amount", "date", "months", "every", "times", "inflation")
+EVENT_DEFAULTS = {"name": "", "months": 1, "every": 0, "times": 1, "inflation": True}
+
+
+def validate_events(events):
+    """Complete each event with defaults; raises ValueError on a malformed one."""
+    if not isinstance(events, list):
+        raise ValueError("cash_events must be a list")
+    valid = []
+    for event in events:
+        if not isinstance(event, dict):
+            raise ValueError("Each cash event must be an object")
+        unknown = sorted(set(event) - set(EVENT_FIELDS))
+        if unknown:
+            raise ValueError(f"Unknown cash event fields: {', '.join(unknown)}")
+        event = dict(EVENT_DEFAULTS, **event)
+        if "amount" not in event or "date" not in event:
+            raise ValueError("Each cash event needs an amount and a date")
+        if isinstance(event["amount"], bool) or not isinstance(event["amount"], (int, float)):
+            raise ValueError("Cash event amounts must be numbers")
+        datetime.date.fromisoformat(event["date"])
+        for field, least in (("months", 1), ("every", 0), ("times", 1)):
+            if isinstance(event[field], bool) or not isinstance(event[field], (int, float)) or event[field] < least:
+                raise ValueError(f"Cash event {field} must be a number of at least {least}")
+        if event["times"] > 1 and event["every"] < 1:
+            raise ValueError("Cash events that repeat must be at least 1 year apart")
+        if not isinstance(event["inflation"], bool):
+            raise ValueError("Cash event inflation must be true or false")
+        valid.append(event)
+    return valid
+
+
+def event_flows(events, dates):
+    """Scatter the events onto the schedule: (nominal, today's-dollar) net flow per month.
+
+    Each event pays `amount` (negative for costs) in each of `months` consecutive
+    months from `date`, repeated `times` times `every` years apart. Inflation-linked
+    amounts are in today's dollars and are grown along each path by simulate();
+    the rest are nominal. Month 0 holds the starting balances, which simulate()
+    does not step, so payments due then (e.g. dated today) land in month 1. Every
+    payment is added in one indexed add per array.
+    """
+    months = len(dates)
+    nominal, real = np.zeros(months), np.zeros(months)
+    if not events or months == 0:
+        return nominal, real
+    index, amount, linked = [], [], []
+    for event in events:
+        start = (np.datetime64(event["date"], "D") - dates[0]).astype(int)
+        starts = start + np.arange(int(event["times"])) * event["every"] * 365.25
+        first = -(-starts // 30).astype(int)  # first calculation date on or after each start
+        rows = (first[:, None] + np.arange(int(event["months"]))).ravel()
+        index.append(rows)
+        amount.append(np.full(len(rows), float(event["amount"])))
+        linked.append(np.full(len(rows), event["inflation"]))
+    index, amount, linked = np.concatenate(index), np.concatenate(amount), np.concatenate(linked)
+    index[index == 0] = 1
+    inside = (index >= 0) & (index < months)
+    np.add.at(nominal, index[inside & ~linked], amount[inside & ~linked])
+    np.add.at(real, index[inside & linked], amount[inside & linked])
+    return nominal, real
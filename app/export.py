@@ -0,0 +1,110 @@
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+from engine import plan_paths, simulate
+
+EXPORT_FORMATS = ("npz", "parquet")
+# Stored value types: full precision, half the size, or rounded to whole dollars
+EXPORT_PRECISIONS = {"Float64": np.float64, "Float32": np.float32, "Whole dollars": np.int64}
+EXPORT_COLUMNS = ("investment", "cash", "income", "spend")
+# Largest export the app offers as a download: Streamlit holds a download's bytes in
+# memory while it is served, so bigger exports should call export_scenarios() directly
+MAX_DOWNLOAD_BYTES = 200_000_000
+
+
+def scenario_chunks(plan, rates, policy=None, max_cells=2_000_000):
+    """Yield (lo, hi, PathResults) for consecutive blocks of paths.
+
+    Each block is one simulate() call over at most max_cells path-months, so the
+    whole (paths, months) cube never has to be held at once.
+    """
+    n_paths, months = rates.shape[:2]
+    step = max(max_cells // max(months, 1), 1)
+    for lo in range(0, n_paths, step):
+        hi = min(lo + step, n_paths)
+        yield lo, hi, simulate(plan_paths(plan, slice(lo, hi), n_paths), rates[lo:hi], policy=policy)
+
+
+def export_bytes(n_paths, months, precision):
+    """Uncompressed size of the exported values, an upper bound on the file for incompressible paths."""
+    return n_paths * months * len(EXPORT_COLUMNS) * np.dtype(EXPORT_PRECISIONS[precision]).itemsize
+
+
+def quantize(values, precision):
+    dtype = EXPORT_PRECISIONS[precision]
+    return np.rint(values).astype(dtype) if np.issubdtype(dtype, np.integer) else values.astype(dtype)
+
+
+def export_scenarios(file, plan, rates, fmt="npz", precision="Float64", policy=None, labels=None,
+                     max_cells=2_000_000, progress=None):
+    """Write every path's monthly investment, cash, income and spend to a columnar file.
+
+    Balances are in today's dollars and flows in nominal dollars, as simulate()
+    reports them. npz holds one (paths, months) array per column, plus the dates and
+    any scenario labels (e.g. the starting year of each historical sequence);
+    parquet holds one row per path and month, written a block of paths per row
+    group. file is a path or a writable binary file object. progress(fraction) is
+    called after each block.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if precision not in EXPORT_PRECISIONS:
+        raise ValueError(f"Unknown export precision: {precision}")
+    writer = _write_npz if fmt == "npz" else _write_parquet
+    writer(file, plan, rates, precision, policy, labels, max_cells, progress)
+
+
+def _write_npz(file, plan, rates, precision, policy, labels, max_cells, progress):
+    # Blocks land in memory-mapped .npy files, which are then compressed into the archive
+    n_paths, months = rates.shape[:2]
+    with tempfile.TemporaryDirectory() as scratch:
+        arrays = {name: np.lib.format.open_memmap(os.path.join(scratch, f"{name}.npy"), mode="w+",
+                                                  dtype=EXPORT_PRECISIONS[precision], shape=(n_paths, months))
+                  for name in EXPORT_COLUMNS}
+        for lo, hi, paths in scenario_chunks(plan, rates, policy, max_cells):
+            for name in EXPORT_COLUMNS:
+                arrays[name][lo:hi] = quantize(getattr(paths, name), precision)
+            if progress is not None:
+                progress(hi / n_paths)
+        for array in arrays.values():
+            array.flush()
+        del arrays
+        with zipfile.ZipFile(file, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1,
+                             allowZip64=True) as archive:
+            for name in EXPORT_COLUMNS:
+                archive.write(os.path.join(scratch, f"{name}.npy"), f"{name}.npy")
+            for name, values in (("dates", plan.dates), ("labels", labels)):
+                if values is not None:
+                    with archive.open(f"{name}.npy", "w") as member:
+                        np.lib.format.write_array(member, np.asarray(values))
+
+
+def _write_parquet(file, plan, rates, precision, policy, labels, max_cells, progress):
+    # pyarrow comes with streamlit; imported here so the engine and service don't need it
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    n_paths, months = rates.shape[:2]
+    writer = None
+    try:
+        for lo, hi, paths in scenario_chunks(plan, rates, policy, max_cells):
+            columns = {
+                "path": np.repeat(np.arange(lo, hi, dtype=np.int32), months),
+                "date": np.tile(plan.dates, hi - lo),
+            }
+            if labels is not None:
+                columns["label"] = np.repeat(np.asarray(labels)[lo:hi], months)
+            for name in EXPORT_COLUMNS:
+                columns[name] = quantize(getattr(paths, name), precision).ravel()
+            table = pa.table(columns)
+            if writer is None:
+                writer = pq.ParquetWriter(file, table.schema, compression="zstd")
+            writer.write_table(table)
+            if progress is not None:
+                progress(hi / n_paths)
+    finally:
+        if writer is not None:
+            writer.close()
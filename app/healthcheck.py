@@ -0,0 +1,28 @@
+"""Readiness check for the container: warm-up has finished and the server answers.
+
+    python app/healthcheck.py    # exit status 0 when ready
+"""
+import os
+import sys
+import urllib.request
+
+from path_cache import WARM_DIR
+
+PORT = os.environ.get("PORT", "8080")
+
+
+def main():
+    if not os.path.exists(os.path.join(WARM_DIR, "ready")):
+        print("warm-up has not finished")
+        return 1
+    try:
+        with urllib.request.urlopen(f"http://localhost:{PORT}/_stcore/health", timeout=5) as response:
+            healthy = response.status == 200
+    except OSError as e:
+        print(f"server not answering: {e}")
+        return 1
+    return 0 if healthy else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
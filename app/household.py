@@ -0,0 +1,110 @@
+import datetime
+
+import numpy as np
+
+# Self and the spouse keep flat profile keys (birthday_self, retire_date_spouse, ...);
+# anyone else is one row of the profile's other_members list, with ISO date strings
+# so it saves as JSON
+PRIMARY = ("self", "spouse")
+MEMBER_FIELDS = ("name", "birthday", "retire_date", "pension_date", "socsec_date", "current_contribution",
+                 "retire_income", "socsec_income", "assisted_age", "life_expectancy", "mortality_table")
+MEMBER_DATES = ("birthday", "retire_date", "pension_date", "socsec_date")
+MEMBER_DEFAULTS = {"name": "", "current_contribution": 0, "retire_income": 0, "socsec_income": 0,
+                   "assisted_age": 90, "life_expectancy": 95, "mortality_table": "Unisex"}
+MORTALITY_TABLES = ("Unisex", "Female", "Male")
+
+
+def validate_members(members):
+    """Complete each extra member with defaults; raises ValueError on a malformed one."""
+    if not isinstance(members, list):
+        raise ValueError("other_members must be a list")
+    valid = []
+    for member in members:
+        if not isinstance(member, dict):
+            raise ValueError("Each household member must be an object")
+        unknown = sorted(set(member) - set(MEMBER_FIELDS))
+        if unknown:
+            raise ValueError(f"Unknown household member fields: {', '.join(unknown)}")
+        member = dict(MEMBER_DEFAULTS, **member)
+        if "birthday" not in member:
+            raise ValueError("Each household member needs a birthday")
+        if not isinstance(member["name"], str):
+            raise ValueError("Household member name must be a string")
+        if member["mortality_table"] not in MORTALITY_TABLES:
+            raise ValueError(f"Household member mortality_table must be one of {', '.join(MORTALITY_TABLES)}")
+        birthday = datetime.date.fromisoformat(member["birthday"])
+        for field in MEMBER_DATES[1:]:  # dates left out fall on the birthday: retired, drawing nothing
+            member.setdefault(field, birthday.isoformat())
+            datetime.date.fromisoformat(member[field])
+        for field in ("current_contribution", "retire_income", "socsec_income", "assisted_age", "life_expectancy"):
+            if isinstance(member[field], bool) or not isinstance(member[field], (int, float)) or member[field] < 0:
+                raise ValueError(f"Household member {field} must be a number of at least 0")
+        valid.append(member)
+    return valid
+
+
+class Household:
+    """Every member's inputs as arrays along one people axis.
+
+    Dates are datetime64[D]; amounts and ages are floats. The first n_earners
+    members are self and the spouse, whose retirement sets the household's.
+    """
+
+    def __init__(self, names, birthday, retire_date, pension_date, socsec_date, contribution, pension,
+                 socsec, assisted_age, life_expectancy, mortality_table, n_earners):
+        self.names = names
+        self.birthday = birthday
+        self.retire_date = retire_date
+        self.pension_date = pension_date
+        self.socsec_date = socsec_date
+        self.contribution = contribution
+        self.pension = pension
+        self.socsec = socsec
+        self.assisted_age = assisted_age
+        self.life_expectancy = life_expectancy
+        self.mortality_table = mortality_table
+        self.n_earners = n_earners
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def retirement(self):
+        """The later of self's and the spouse's retirement dates."""
+        return self.retire_date[:self.n_earners].max()
+
+    def ages(self, dates):
+        """(people, months) whole-year ages on each date."""
+        return (dates - self.birthday[:, None]).astype(int) // 365
+
+
+def members(profile):
+    """Self, the spouse (unless single) and any other members, as dicts of MEMBER_FIELDS."""
+    people = PRIMARY if profile["has_spouse"] else PRIMARY[:1]
+    rows = [dict({f: profile[f"{f}_{person}"] for f in MEMBER_FIELDS[1:]}, name=person) for person in people]
+    for member in profile["other_members"]:
+        rows.append(dict(member, **{f: datetime.date.fromisoformat(member[f]) for f in MEMBER_DATES}))
+    return rows
+
+
+def household(profile):
+    """The profile's household as arrays along the people axis."""
+    rows = members(profile)
+
+    def column(field, dtype=float):
+        return np.array([row[field] for row in rows], dtype=dtype)
+
+    return Household(
+        names=[row["name"] or f"member {i}" for i, row in enumerate(rows)],
+        birthday=column("birthday", "datetime64[D]"),
+        retire_date=column("retire_date", "datetime64[D]"),
+        pension_date=column("pension_date", "datetime64[D]"),
+        socsec_date=column("socsec_date", "datetime64[D]"),
+        contribution=column("current_contribution"),
+        pension=column("retire_income"),
+        socsec=column("socsec_income"),
+        assisted_age=column("assisted_age"),
+        life_expectancy=column("life_expectancy"),
+        mortality_table=[row["mortality_table"] for row in rows],
+        n_earners=2 if profile["has_spouse"] else 1,
+    )
@@ -0,0 +1,49 @@
+import hashlib
+import io
+import json
+import os
+import threading
+
+from botocore.exceptions import ClientError
+
+
+class LocalS3Client:
+    """Filesystem stand-in for the subset of the boto3 S3 client the app uses.
+
+    Selected by setting LOCAL_S3_DIR, for load tests and offline development.
+    Objects live under <root>/<bucket>/<key>, with their metadata alongside.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _path(self, bucket, key):
+        return os.path.join(self.root, bucket, key)
+
+    def put_object(self, Bucket, Key, Body, Metadata=None):
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        etag = f'"{hashlib.md5(Body).hexdigest()}"'
+        with self._lock:
+            with open(path, "wb") as f:
+                f.write(Body)
+            with open(f"{path}.meta", "w") as f:
+                json.dump({"Metadata": Metadata or {}, "ETag": etag}, f)
+        return {"ETag": etag}
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        path = self._path(Bucket, Key)
+        with self._lock:
+            try:
+                with open(path, "rb") as f:
+                    body = f.read()
+                with open(f"{path}.meta") as f:
+                    meta = json.load(f)
+            except FileNotFoundError:
+                raise ClientError({"Error": {"Code": "NoSuchKey", "Message": "The specified key does not exist."}},
+                                  "GetObject")
+        if IfNoneMatch is not None and IfNoneMatch == meta["ETag"]:
+            raise ClientError({"Error": {"Code": "304", "Message": "Not Modified"}}, "GetObject")
+        return {"Body": io.BytesIO(body), "Metadata": meta["Metadata"], "ETag": meta["ETag"],
+                "ContentLength": len(body)}
@@ -0,0 +1,78 @@
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+
+from engine import horizon_months
+from household import household
+
+# One-year death probabilities q(x) by age and sex: a Gompertz-Makeham law fitted to
+# recent US period life tables (life expectancy at 65 of about 18 years for men and
+# 22 for women). Replace the file with an official table to refine it.
+MORTALITY_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mortality.csv")
+
+_table = None
+
+
+def mortality_table():
+    """Death probabilities by age (rows) for each table, with Unisex the mean of the two sexes."""
+    global _table
+    if _table is None:
+        table = pd.read_csv(MORTALITY_CSV, index_col="Age")
+        table["Unisex"] = (table["Female"] + table["Male"]) / 2
+        _table = table
+    return _table
+
+
+def max_age():
+    return int(mortality_table().index[-1])
+
+
+def sample_death_ages(birthday, table, n_paths, rng=None, today=None):
+    """Age at death, in fractional years, for n_paths lives, given survival to today.
+
+    Whole years come from the table's survival curve from the current age (one
+    inverse-CDF lookup for all paths); the month within the year is uniform.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    today = today or datetime.date.today()
+    q = mortality_table()[table].to_numpy()
+    age = min((today - birthday).days / 365.25, max_age())
+    current = int(age)
+    survival = np.cumprod(1 - q[current:])
+    deaths = 1 - survival  # P(dead by the end of each year of age)
+    years = current + np.searchsorted(deaths, rng.random(n_paths), side="right")
+    years = np.minimum(years, max_age())
+    return np.maximum(years + rng.random(n_paths), age)
+
+
+def death_dates(profile, n_paths, rng=None, today=None):
+    """Sampled date of death for each household member on every path, (people, n_paths), for build_plan()."""
+    people = household(profile)
+    dates = np.empty((len(people), n_paths), dtype="datetime64[D]")
+    for p, birthday in enumerate(people.birthday.astype(datetime.date)):
+        ages = sample_death_ages(birthday, people.mortality_table[p], n_paths, rng, today)
+        dates[p] = np.datetime64(birthday, "D") + np.round(ages * 365.25).astype("timedelta64[D]")
+    return dates
+
+
+def longevity_horizon(profile, today=None):
+    """Months from today until every member reaches the table's last age."""
+    oldest = max_age()
+    profile = dict(profile, life_expectancy_self=oldest, life_expectancy_spouse=oldest,
+                   other_members=[dict(m, life_expectancy=oldest) for m in profile["other_members"]])
+    return horizon_months(profile, today)
+
+
+def last_alive_month(plan_dates, deaths):
+    """Index of the last month in which anyone on each path is alive."""
+    return np.clip(np.searchsorted(plan_dates, deaths.max(axis=0)) - 1, 0, len(plan_dates) - 1)
+
+
+def outcomes(totals, last_month):
+    """Wealth at the last death and whether assets ran out first, per path."""
+    rows = np.arange(len(totals))
+    depleted = totals <= 1  # within a dollar of nothing
+    first_depleted = np.where(depleted.any(axis=1), depleted.argmax(axis=1), totals.shape[1])
+    return totals[rows, last_month], first_depleted <= last_month
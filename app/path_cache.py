@@ -0,0 +1,144 @@
+import ast
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from rate_store import STORE_DIR
+
+DEFAULT_MAX_BYTES = int(os.environ.get("PATH_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+# Entries precomputed by warmup.py at container start, loaded by the server process
+WARM_DIR = os.environ.get("WARM_CACHE_DIR", os.path.join(STORE_DIR, "warm"))
+
+
+class _Flight:
+    """One in-progress computation that concurrent callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class PathCache:
+    """Process-wide LRU of generated scenario arrays, bounded by total bytes.
+
+    Concurrent requests for a key that is still being computed wait for that one
+    computation instead of starting their own (single-flight). Cached arrays are
+    shared between sessions, so they are made read-only.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get_or_compute(self, key, compute):
+        """Return the cached array for key, computing it at most once across threads."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.waits += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = compute()
+            if isinstance(value, np.ndarray):
+                value.setflags(write=False)
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            flight.value = value
+            self.put(key, value)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+        return value
+
+    def put(self, key, value):
+        """Insert an array, evicting least-recently-used entries to stay within max_bytes."""
+        size = value.nbytes
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key).nbytes
+            self._entries[key] = value
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def save(self, directory, keys):
+        """Write the given entries to directory as .npy files plus an index of their keys."""
+        os.makedirs(directory, exist_ok=True)
+        index = {}
+        for i, key in enumerate(keys):
+            filename = f"entry-{i}.npy"
+            np.save(os.path.join(directory, filename), np.ascontiguousarray(self._entries[key]))
+            index[repr(key)] = filename
+        with open(os.path.join(directory, "index.json"), "w") as f:
+            json.dump(index, f)
+
+    def load(self, directory):
+        """Memory-map entries written by save(); returns how many were loaded."""
+        try:
+            with open(os.path.join(directory, "index.json")) as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return 0
+        for key, filename in index.items():
+            self.put(ast.literal_eval(key), np.load(os.path.join(directory, filename), mmap_mode="r"))
+        return len(index)
+
+    def stats(self):
+        return {"entries": len(self._entries), "bytes": self.nbytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "waits": self.waits}
+
+
+# Shared by every session in this process
+path_cache = PathCache()
+_preloaded = set()
+
+
+def preload(directory=WARM_DIR):
+    """Load warm-start entries into the shared cache, once per process."""
+    if directory not in _preloaded:
+        with path_cache._lock:
+            first = directory not in _preloaded
+            _preloaded.add(directory)
+        if first:
+            path_cache.load(directory)
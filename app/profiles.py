@@ -0,0 +1,86 @@
+import datetime
+import hashlib
+
+# Inputs of the default household, in the shape saved to and loaded from S3.
+# The historical rate window defaults to the full table and is added by the app.
+DEFAULT_PROFILE = {
+    "current_investment": 1000000,
+    "current_cash": 200000,
+    "current_contribution_self": 5000,
+    "current_contribution_spouse": 5000,
+    "retire_income_self": 4000,
+    "retire_income_spouse": 4000,
+    "socsec_income_self": 0,
+    "socsec_income_spouse": 0,
+    "retire_need_spend": 8000,
+    "retire_luxury_spend": 1000,
+    "retire_assisted": 7000,
+    "birthday_self": datetime.date(1980, 1, 1),
+    "birthday_spouse": datetime.date(1980, 1, 1),
+    "retire_date_self": datetime.date(2045, 1, 1),
+    "retire_date_spouse": datetime.date(2045, 1, 1),
+    "pension_date_self": datetime.date(2045, 1, 1),
+    "pension_date_spouse": datetime.date(2045, 1, 1),
+    "socsec_date_self": datetime.date(2045, 1, 1),
+    "socsec_date_spouse": datetime.date(2045, 1, 1),
+    "assisted_age_self": 90,
+    "assisted_age_spouse": 90,
+    "life_expectancy_self": 95,
+    "life_expectancy_spouse": 95,
+    "has_spouse": True,
+    "other_members": [],
+    "inflation": 2.0,
+    "return_cash": 2.0,
+    "return_stock": 11.0,
+    "return_bond": 4.5,
+    "projection_years": 30,
+    "stock_assets": "Stocks: 100",
+    "bond_assets": "Bonds: 100",
+    "cash_set_point": 50000,
+    "stock_allocation_pre_retirement": 80,
+    "stock_allocation_post_retirement": 50,
+    "glide_path": "Step at retirement",
+    "age_in_bonds_base": 110,
+    "glide_custom": "50: 80, 65: 50, 85: 30",
+    "rebalancing": "Monthly",
+    "rebalance_band": 5,
+    "trading_cost": 0,
+    "cash_events": [],
+    "tax_aware": False,
+    "deferred_pct": 60,
+    "roth_pct": 10,
+    "withdrawal_order": "Taxable, deferred, Roth",
+    "taxable_gain_pct": 50,
+    "capital_gains_rate": 15,
+    "stress_tests": False,
+    "stress_start": "Retirement",
+    "stress_shocks": [{"name": "Stocks -35% in the retirement year", "asset": "Stocks", "return": -35.0, "year": 0}],
+    "rate_mode": "Historical",
+    "sequence_wrap": True,
+    "n_simulations": 100,
+    "sampling_method": "Independent",
+    "common_random_numbers": True,
+    "engine_precision": "Float64",
+    "random_seed": 0,
+    "return_model": "Historical resample",
+    "t_degrees_of_freedom": 5,
+    "spending_policy": "Stocks beat inflation",
+    "spending_rate": 4.0,
+    "spending_floor": 50,
+    "spending_ceiling": 150,
+    "stochastic_longevity": False,
+    "mortality_table_self": "Unisex",
+    "mortality_table_spouse": "Unisex",
+}
+
+
+def default_profile(rate_stats):
+    """The default inputs with the rate window set to the full historical table."""
+    return dict(DEFAULT_PROFILE, rate_window=(rate_stats.first_year, rate_stats.last_year))
+
+
+def profile_fingerprint(profile, keys):
+    """Stable hash of the given inputs, for spotting changes and keying cached results."""
+    # Saved profiles come back from JSON with lists where the app uses tuples
+    values = [(k, tuple(profile[k]) if isinstance(profile[k], list) else profile[k]) for k in keys]
+    return hashlib.sha1(repr(values).encode()).hexdigest()
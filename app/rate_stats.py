@@ -0,0 +1,106 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from rate_store import RATE_COLUMNS
+
+
+class WindowStats:
+    """Return statistics of the historical table over an inclusive year window."""
+
+    def __init__(self, start_year, end_year, geo_mean, arith_mean, volatility, correlation,
+                 log_mean, log_cov):
+        self.start_year = start_year
+        self.end_year = end_year
+        self.geo_mean = geo_mean
+        self.arith_mean = arith_mean
+        self.volatility = volatility
+        self.correlation = correlation
+        # Mean and covariance of log(1 + r), the parameters of a fitted lognormal
+        self.log_mean = log_mean
+        self.log_cov = log_cov
+
+    @property
+    def geo_mean_monthly(self):
+        return (1 + self.geo_mean) ** (1 / 12) - 1
+
+    def summary(self):
+        """Per-asset table of the window statistics, in percent."""
+        return {
+            "Geometric mean (%)": dict(zip(RATE_COLUMNS, np.round(self.geo_mean * 100, 2))),
+            "Arithmetic mean (%)": dict(zip(RATE_COLUMNS, np.round(self.arith_mean * 100, 2))),
+            "Volatility (%)": dict(zip(RATE_COLUMNS, np.round(self.volatility * 100, 2))),
+        }
+
+
+class RateStats:
+    """O(1) window statistics from prefix sums over the annual rate table."""
+
+    def __init__(self, years, annual):
+        annual = np.asarray(annual, dtype=np.float64)
+        self.years = np.asarray(years)
+        n, k = annual.shape
+        logs = np.log1p(annual)
+        # Leading zero row so any window [i, j) is prefix[j] - prefix[i]
+        self._log = np.zeros((n + 1, k))
+        np.cumsum(logs, axis=0, out=self._log[1:])
+        self._sum = np.zeros((n + 1, k))
+        np.cumsum(annual, axis=0, out=self._sum[1:])
+        self._cross = np.zeros((n + 1, k, k))
+        np.cumsum(annual[:, :, None] * annual[:, None, :], axis=0, out=self._cross[1:])
+        self._log_cross = np.zeros((n + 1, k, k))
+        np.cumsum(logs[:, :, None] * logs[:, None, :], axis=0, out=self._log_cross[1:])
+
+    @property
+    def first_year(self):
+        return int(self.years[0])
+
+    @property
+    def last_year(self):
+        return int(self.years[-1])
+
+    def indices(self, start_year=None, end_year=None):
+        """Row range [lo, hi) covering the inclusive year window."""
+        lo = 0 if start_year is None else int(np.searchsorted(self.years, start_year, side="left"))
+        hi = len(self.years) if end_year is None else int(np.searchsorted(self.years, end_year, side="right"))
+        if hi <= lo:
+            raise ValueError(f"No historical data between {start_year} and {end_year}")
+        return lo, hi
+
+    def window(self, start_year=None, end_year=None):
+        lo, hi = self.indices(start_year, end_year)
+        n = hi - lo
+        log_mean = (self._log[hi] - self._log[lo]) / n
+        geo_mean = np.expm1(log_mean)
+        arith_mean = (self._sum[hi] - self._sum[lo]) / n
+        cov = _sample_cov(self._cross[hi] - self._cross[lo], arith_mean, n)
+        log_cov = _sample_cov(self._log_cross[hi] - self._log_cross[lo], log_mean, n)
+        volatility = np.sqrt(np.clip(np.diag(cov), 0, None))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlation = cov / np.outer(volatility, volatility)
+        return WindowStats(int(self.years[lo]), int(self.years[hi - 1]),
+                           geo_mean, arith_mean, volatility, correlation, log_mean, log_cov)
+
+
+def _sample_cov(cross_sum, mean, n):
+    cov = cross_sum / n - np.outer(mean, mean)
+    return cov * n / (n - 1) if n > 1 else cov
+
+
+# --- Process-wide access ---
+MAX_STATS = 32  # rate tables' statistics kept per process, least recently used evicted first
+_lock = threading.Lock()
+_stats = OrderedDict()
+
+
+def get_rate_stats(store):
+    """Return the RateStats for a RateStore or mixed tables, derived once per version."""
+    with _lock:
+        stats = _stats.get(store.checksum)
+        if stats is None:
+            stats = _stats[store.checksum] = RateStats(store.years, store.annual)
+            if len(_stats) > MAX_STATS:
+                _stats.popitem(last=False)
+        else:
+            _stats.move_to_end(store.checksum)
+    return stats
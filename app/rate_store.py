@@ -0,0 +1,280 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Column order of every rate array the engine reads (and of the rate tensors built from it)
+RATE_COLUMNS = ["Stocks", "Bonds", "Cash", "Inflation"]
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.environ.get("RATE_DATA_CSV", os.path.join(APP_DIR, "hist_data.csv"))
+STORE_DIR = os.environ.get("RATE_STORE_DIR", os.path.join(APP_DIR, ".rate_store"))
+STORE_VERSION = 2  # bumped whenever the compiled layout changes
+CHUNK_ROWS = 100_000  # CSV rows parsed at a time
+
+_ARRAYS = ("years", "annual", "monthly", "geo_mean_annual", "geo_mean_monthly")
+
+
+class RateTables:
+    """Historical rates laid out for the engine: a row per year, a column per RATE_COLUMNS entry."""
+
+    columns = RATE_COLUMNS
+
+    def __init__(self, checksum, years, annual, monthly, geo_mean_annual, geo_mean_monthly):
+        self.checksum = checksum
+        self.years = years
+        self.annual = annual
+        self.monthly = monthly
+        self.geo_mean_annual = geo_mean_annual
+        self.geo_mean_monthly = geo_mean_monthly
+
+    def __len__(self):
+        return len(self.years)
+
+    def frame(self):
+        """Annual returns as a DataFrame, laid out like hist_data.csv."""
+        table = pd.DataFrame(np.asarray(self.annual), columns=RATE_COLUMNS)
+        table.insert(0, "Year", np.asarray(self.years))
+        return table
+
+
+class RateStore(RateTables):
+    """Read-only, memory-mapped view of the compiled historical rate table.
+
+    Besides the engine's tables it holds the annual return of every asset the
+    source declares (assets, one column per asset_columns entry, NaN in years an
+    asset has no data), which mixed_store() blends into other engine tables.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in _ARRAYS}
+        super().__init__(self.manifest["checksum"], **arrays)
+        self.asset_columns = self.manifest["columns"]
+        self.asset_years = np.load(os.path.join(path, "asset_years.npy"), mmap_mode="r")
+        self.assets = np.load(os.path.join(path, "assets.npy"), mmap_mode="r")
+
+
+def engine_tables(years, annual):
+    """The engine's arrays for annual returns in RATE_COLUMNS order."""
+    geo_mean_annual = np.prod(1 + annual, axis=0) ** (1 / len(annual)) - 1
+    return {
+        "years": years,
+        "annual": annual,
+        "monthly": (1 + annual) ** (1 / 12) - 1,
+        "geo_mean_annual": geo_mean_annual,
+        "geo_mean_monthly": (1 + geo_mean_annual) ** (1 / 12) - 1,
+    }
+
+
+# --- Compilation ---
+def csv_checksum(csv_path=CSV_PATH):
+    """SHA-256 of the raw CSV bytes."""
+    with open(csv_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def read_returns(csv_path=CSV_PATH, chunk_rows=CHUNK_ROWS):
+    """(years, asset names, (years, assets) annual returns) from a CSV of returns.
+
+    The CSV has a Year column (annual returns) or a Date column such as 2024-01 or
+    2024-01-31 (monthly returns, compounded into calendar years; years with fewer
+    than 12 months are dropped). Every column parsed as floats in the first rows
+    is an asset; other columns (e.g. Downside) are ignored. The rest of the file
+    is then read in typed chunks, only the declared columns. Blank cells are NaN,
+    so assets may start and end in different years.
+    """
+    head = pd.read_csv(csv_path, nrows=1000)
+    key = "Year" if "Year" in head.columns else "Date" if "Date" in head.columns else None
+    if key is None:
+        raise ValueError(f"{os.path.basename(csv_path)} needs a Year or a Date column")
+    assets = [c for c in head.columns if c != key and pd.api.types.is_float_dtype(head[c])]
+    missing = [c for c in RATE_COLUMNS if c not in assets]
+    if missing:
+        raise ValueError(f"{os.path.basename(csv_path)} is missing return columns: {', '.join(missing)}")
+    # The engine's columns come first
+    assets = RATE_COLUMNS + [c for c in assets if c not in RATE_COLUMNS]
+
+    keys, values = [], []
+    dtypes = dict({key: str}, **{c: np.float64 for c in assets})
+    for chunk in pd.read_csv(csv_path, usecols=[key] + assets, dtype=dtypes, chunksize=chunk_rows):
+        keys.append(chunk[key].to_numpy(dtype=str))
+        values.append(chunk[assets].to_numpy(dtype=np.float64))
+    keys = np.concatenate(keys) if keys else np.array([], dtype=str)
+    values = np.concatenate(values) if values else np.zeros((0, len(assets)))
+
+    years = keys.astype("U4").astype(np.int32)
+    if key == "Date":
+        months = np.char.partition(np.char.replace(keys, "/", "-").astype("U7"), "-")[:, 2].astype(np.int32)
+        order = np.lexsort((months, years))
+        years, values = years[order], values[order]
+        first_years, starts, counts = np.unique(years, return_index=True, return_counts=True)
+        logs = np.add.reduceat(np.log1p(values), starts, axis=0) if len(starts) else values
+        whole = counts == 12
+        years, values = first_years[whole], np.expm1(logs[whole])
+    order = np.argsort(years, kind="stable")
+    return years[order], assets, values[order]
+
+
+def compile_rate_store(csv_path=CSV_PATH, store_dir=STORE_DIR, checksum=None):
+    """Compile the CSV into a checksum-named directory of .npy arrays; return its path."""
+    checksum = checksum or csv_checksum(csv_path)
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    path = os.path.join(store_dir, f"{stem}-v{STORE_VERSION}-{checksum[:16]}")
+    if os.path.exists(os.path.join(path, "manifest.json")):
+        return path
+
+    years, assets, values = read_returns(csv_path)
+    # The engine's tables cover the years in which all of its columns have data
+    complete = ~np.isnan(values[:, :len(RATE_COLUMNS)]).any(axis=1)
+    if not complete.any():
+        raise ValueError(f"{os.path.basename(csv_path)} has no year with every return column filled in")
+    arrays = engine_tables(years[complete], values[complete, :len(RATE_COLUMNS)])
+    arrays["asset_years"] = years
+    arrays["assets"] = values
+
+    # Build in a scratch directory and rename into place so readers never see a partial store
+    os.makedirs(store_dir, exist_ok=True)
+    scratch = tempfile.mkdtemp(dir=store_dir, prefix=".build-")
+    try:
+        for name, values in arrays.items():
+            np.save(os.path.join(scratch, f"{name}.npy"), np.ascontiguousarray(values))
+        with open(os.path.join(scratch, "manifest.json"), "w") as f:
+            json.dump({"checksum": checksum, "source": os.path.basename(csv_path), "version": STORE_VERSION,
+                       "columns": assets, "rows": int(complete.sum())}, f)
+        # mkdtemp makes the directory private; the store is shared with workers under other users
+        os.chmod(scratch, 0o755)
+        for name in os.listdir(scratch):
+            os.chmod(os.path.join(scratch, name), 0o644)
+        os.rename(scratch, path)
+    except OSError:
+        # Another process won the race; its store is identical
+        shutil.rmtree(scratch, ignore_errors=True)
+        if not os.path.exists(os.path.join(path, "manifest.json")):
+            raise
+    _remove_stale_stores(store_dir, stem, keep=path)
+    return path
+
+
+def _remove_stale_stores(store_dir, stem, keep):
+    # Open memory maps stay valid after unlink, so older stores can go immediately
+    for name in os.listdir(store_dir):
+        candidate = os.path.join(store_dir, name)
+        if name.startswith(f"{stem}-") and candidate != keep:
+            shutil.rmtree(candidate, ignore_errors=True)
+
+
+# --- Asset mixes ---
+# Profile keys listing the "asset: weight" entries behind an engine column; the
+# other columns always come from the asset of the same name
+ASSET_MIX_KEYS = {"Stocks": "stock_assets", "Bonds": "bond_assets"}
+
+
+def parse_asset_mix(text, assets):
+    """(asset names, weights summing to 1) from text like "Stocks: 70, International: 30".
+
+    The result is canonical, so texts describing the same mix give the same value:
+    repeated assets are merged, names sorted and weights rounded to 1e-6.
+    """
+    names, weights = [], []
+    for item in text.replace(";", ",").split(","):
+        if not item.strip():
+            continue
+        name, sep, weight = item.rpartition(":")
+        if not sep:
+            raise ValueError(f"Asset mix entry '{item.strip()}' should be asset: weight")
+        if name.strip() not in assets:
+            raise ValueError(f"Unknown asset '{name.strip()}'; the return data has {', '.join(assets)}")
+        names.append(name.strip())
+        weights.append(float(weight))
+    if not names:
+        raise ValueError("An asset mix needs at least one asset: weight entry")
+    weights = np.array(weights)
+    if not np.all(np.isfinite(weights)) or np.any(weights < 0) or weights.sum() <= 0:
+        raise ValueError("Asset mix weights must be positive")
+    merged = {}
+    for name, weight in zip(names, weights / weights.sum()):
+        merged[name] = merged.get(name, 0.0) + weight
+    names = sorted(merged)
+    weights = np.round([merged[name] for name in names], 6)
+    return tuple(names), tuple(weights / weights.sum())
+
+
+def asset_mix(store, profile):
+    """The assets and weights behind each engine column, in RATE_COLUMNS order."""
+    return tuple(parse_asset_mix(profile[ASSET_MIX_KEYS[column]], store.asset_columns)
+                 if column in ASSET_MIX_KEYS else ((column,), (1.0,)) for column in RATE_COLUMNS)
+
+
+def mix_tables(store, mix):
+    """Engine tables for a mix, over the years in which every asset it uses has data.
+
+    Each column is the weighted sum of its assets' monthly returns, i.e. a sleeve
+    rebalanced to its weights every month.
+    """
+    index = {name: i for i, name in enumerate(store.asset_columns)}
+    monthly_assets = (1 + np.asarray(store.assets)) ** (1 / 12) - 1
+    monthly = np.stack([monthly_assets[:, [index[name] for name in names]] @ np.array(weights)
+                        for names, weights in mix], axis=1)
+    complete = ~np.isnan(monthly).any(axis=1)
+    if not complete.any():
+        raise ValueError("The chosen assets have no year of data in common")
+    checksum = hashlib.sha256(repr((store.checksum, mix)).encode()).hexdigest()
+    return RateTables(checksum, **engine_tables(np.asarray(store.asset_years)[complete],
+                                                (1 + monthly[complete]) ** 12 - 1))
+
+
+# --- Process-wide access ---
+MAX_MIXES = 32  # asset mixes kept per process, least recently used evicted first
+_lock = threading.Lock()
+_stores = {}
+_mixes = OrderedDict()
+
+
+def get_rate_store(csv_path=CSV_PATH, store_dir=STORE_DIR):
+    """Return the shared RateStore, rebuilding it only when the CSV has changed."""
+    stat = os.stat(csv_path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _stores.get(csv_path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with _lock:
+        cached = _stores.get(csv_path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        checksum = csv_checksum(csv_path)
+        if cached is not None and cached[1].checksum == checksum:
+            store = cached[1]  # touched but unchanged
+        else:
+            store = RateStore(compile_rate_store(csv_path, store_dir, checksum))
+        _stores[csv_path] = (stamp, store)
+        return store
+
+
+def mixed_store(store, profile):
+    """The engine tables for a profile's asset mix; raises ValueError on an invalid mix.
+
+    The default mix (each column its own asset) is the store itself; any other is
+    derived once per store version and mix and shared by every session, up to the
+    MAX_MIXES most recently used.
+    """
+    mix = asset_mix(store, profile)
+    if all(names == (column,) for column, (names, _) in zip(RATE_COLUMNS, mix)):
+        return store
+    key = (store.checksum, mix)
+    with _lock:
+        tables = _mixes.get(key)
+        if tables is None:
+            tables = _mixes[key] = mix_tables(store, mix)
+            if len(_mixes) > MAX_MIXES:
+                _mixes.popitem(last=False)
+        else:
+            _mixes.move_to_end(key)
+    return tables
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+# Money is rounded to whole dollars and held as float32 (exact to $1 up to ~$16M,
+# ~7 significant digits beyond that); ages fit comfortably in int16.
+MONEY_DTYPE = np.float32
+AGE_DTYPE = np.int16
+
+# Balances are reported at the end of each year, flows are summed over the year
+BALANCE_COLUMNS = ["Investment", "Cash"]
+FLOW_COLUMNS = ["Spend", "Income", "Savings", "Retirement Income", "Assisted"]
+
+
+class SimulationResults:
+    """Compact per-month results of a single simulation path."""
+
+    def __init__(self, dates, investment, cash, spend, income, savings,
+                 retirement_income, assisted, ages):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.money = {
+            "Investment": _money(investment),
+            "Cash": _money(cash),
+            "Spend": _money(spend),
+            "Income": _money(income),
+            "Savings": _money(savings),
+            "Retirement Income": _money(retirement_income),
+            "Assisted": _money(assisted),
+        }
+        # One column per household member, e.g. age_self, age_spouse
+        self.ages = {name: np.asarray(values, dtype=AGE_DTYPE) for name, values in ages.items()}
+        self._annual = None
+        self._monthly = None
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def total(self):
+        return self.money["Investment"] + self.money["Cash"]
+
+    @property
+    def final_total(self):
+        return float(self.total[-1]) if len(self) else 0.0
+
+    @property
+    def nbytes(self):
+        arrays = [self.dates] + list(self.money.values()) + list(self.ages.values())
+        return sum(a.nbytes for a in arrays)
+
+    def annual(self):
+        """Roll the monthly path up to one row per calendar year."""
+        if self._annual is None:
+            years = self.dates.astype("datetime64[Y]").astype(int) + 1970
+            starts = np.flatnonzero(np.r_[True, years[1:] != years[:-1]]) if len(years) else np.array([], dtype=int)
+            ends = np.r_[starts[1:], len(years)] - 1
+            frame = {"Year": years[starts].astype(AGE_DTYPE)}
+            for name in BALANCE_COLUMNS:
+                frame[name] = self.money[name][ends]
+            frame["Total"] = self.total[ends]
+            for name in FLOW_COLUMNS:
+                frame[name] = np.add.reduceat(self.money[name], starts) if len(starts) else self.money[name]
+            for name, ages in self.ages.items():
+                frame[name] = ages[ends]
+            self._annual = pd.DataFrame(frame)
+        return self._annual
+
+    def monthly(self):
+        """Full per-month table, built only when the detail view asks for it."""
+        if self._monthly is None:
+            self._monthly = pd.DataFrame({
+                "Date": self.dates,
+                "Investment": self.money["Investment"],
+                "Cash": self.money["Cash"],
+                "Total": self.total,
+                "Spend": self.money["Spend"],
+                "Income": self.money["Income"],
+                **self.ages,
+                "Savings": self.money["Savings"],
+                "Retirement Income": self.money["Retirement Income"],
+                "Assisted": self.money["Assisted"],
+            })
+        return self._monthly
+
+
+def _money(values):
+    return np.round(np.asarray(values, dtype=np.float64)).astype(MONEY_DTYPE)
@@ -1,6 +1,7 @@
 import json
 import datetime
 import os
+import tempfile
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
@@ -11,13 +12,39 @@ import boto3
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from allocation import GLIDE_PATHS, REBALANCING, parse_glide_points
+from autosave import Autosaver
+from claiming import OBJECTIVES, optimize_claiming
+from blob_cache import profile_blobs
+from botocore.exceptions import ClientError
+from engine import ENGINE_PRECISIONS, build_plan, horizon_months, month_dates, simulate, simulate_annual, simulate_float32
+from events import EVENT_DEFAULTS, EVENT_FIELDS, validate_events
+from export import EXPORT_FORMATS, EXPORT_PRECISIONS, MAX_DOWNLOAD_BYTES, export_bytes, export_scenarios
+from household import MEMBER_DATES, MEMBER_DEFAULTS, MEMBER_FIELDS, MORTALITY_TABLES, household, validate_members
+from local_s3 import LocalS3Client
+from longevity import death_dates, last_alive_month, longevity_horizon, outcomes
+from path_cache import path_cache, preload
+from profiles import default_profile, profile_fingerprint
+from rate_stats import get_rate_stats
+from rate_store import RATE_COLUMNS, get_rate_store, mixed_store
+from results import SimulationResults
+from scenarios import (RETURN_MODELS, SAMPLING_METHODS, convergence_report, draw_scenarios, historical_sequences,
+                       scenario_key, totals_key)
+from sensitivity import sensitivity_report
+from spending import SPENDING_POLICIES, spending_policy
+from stress import SHOCK_FIELDS, STRESS_STARTS, stress_report, validate_shocks
+from taxes import WITHDRAWAL_ORDERS
 
 # Page config
 st.set_page_config(page_title="Retirement Calculator", layout="wide")
 
 # --- S3 Configuration ---
 S3_BUCKET_NAME = "retirement-savings-calculator" 
-s3_client = boto3.client("s3", region_name=os.environ.get("AWS_REGION", "us-east-1"))
+if os.environ.get("LOCAL_S3_DIR"):
+    # Local filesystem stand-in, for load tests and offline development
+    s3_client = LocalS3Client(os.environ["LOCAL_S3_DIR"])
+else:
+    s3_client = boto3.client("s3", region_name=os.environ.get("AWS_REGION", "us-east-1"))
 
 # --- Encryption Utilities ---
 def generate_key_from_password(password, salt=None):
@@ -49,36 +76,63 @@ def decrypt_data(encrypted_data, password, salt):
     return json.loads(decrypted_data)
 
 # --- Storage Utilities ---
-def save_state_to_s3(user_id, password, filename=None):
-    """Save state to S3 with encryption."""
+def profile_snapshot():
+    """Session state to persist, with dates as ISO strings."""
     def convert(o):
         if isinstance(o, datetime.date):
             return o.isoformat()
         return o
+
+    return {k: convert(v) for k, v in st.session_state.items() 
+            if k not in ['user_id', 'password'] and not k.startswith('_')}
+
+def upload_profile(user_id, password, data):
+    """Encrypt a profile snapshot and write it to S3. Safe to call off the script thread."""
+    # Encrypt data
+    encrypted_data, salt = encrypt_data(data, password)
+    
+    # Add metadata
+    metadata = {
+        'salt': base64.b64encode(salt).decode(),
+        'timestamp': datetime.datetime.now().isoformat()
+    }
+    
+    # Save to S3
+    filename = f"user_data/{user_id}.enc"
+    response = s3_client.put_object(
+        Bucket=S3_BUCKET_NAME,
+        Key=filename,
+        Body=encrypted_data,
+        Metadata=metadata
+    )
     
+    # What we just wrote is the current version; a later load can revalidate it
+    profile_blobs.put(filename, response.get('ETag'), encrypted_data, metadata)
+
+def fetch_profile_blob(user_id):
+    """Encrypted profile and its metadata, revalidated against the node-local cache by ETag."""
+    filename = f"user_data/{user_id}.enc"
+    cached = profile_blobs.get(filename)
     try:
-        # Prepare data
-        data = {k: convert(v) for k, v in st.session_state.items() 
-                if k not in ['user_id', 'password']}
-        
-        # Encrypt data
-        encrypted_data, salt = encrypt_data(data, password)
-        
-        # Add metadata
-        metadata = {
-            'salt': base64.b64encode(salt).decode(),
-            'timestamp': datetime.datetime.now().isoformat()
-        }
-        
-        # Save to S3
-        filename = f"user_data/{user_id}.enc"
-            
-        s3_client.put_object(
-            Bucket=S3_BUCKET_NAME,
-            Key=filename,
-            Body=encrypted_data,
-            Metadata=metadata
-        )
+        if cached is None:
+            response = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=filename)
+        else:
+            response = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=filename, IfNoneMatch=cached.etag)
+    except ClientError as e:
+        if cached is not None and e.response['Error']['Code'] in ('304', 'NotModified'):
+            return cached.body, cached.metadata  # unchanged since we last saw it
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            profile_blobs.discard(filename)
+        raise
+    
+    encrypted_data = response['Body'].read()
+    profile_blobs.put(filename, response.get('ETag'), encrypted_data, response['Metadata'])
+    return encrypted_data, response['Metadata']
+
+def save_state_to_s3(user_id, password, filename=None):
+    """Save state to S3 with encryption."""
+    try:
+        upload_profile(user_id, password, profile_snapshot())
         
         # Store user_id in session state
         st.session_state['user_id'] = user_id
@@ -87,22 +141,51 @@ def save_state_to_s3(user_id, password, filename=None):
         st.error(f"Error saving state: {e}")
         return False
 
+# One background uploader per process; coalesces bursts of edits into one write
+@st.cache_resource
+def get_autosaver():
+    return Autosaver(upload_profile)
+
+def autosave_if_changed():
+    """Queue a background save when autosave is on and the profile has changed."""
+    snapshot = profile_snapshot()
+    fingerprint = profile_fingerprint(snapshot, sorted(snapshot))
+    if fingerprint != st.session_state.get("_autosaved_fingerprint"):
+        st.session_state["_autosaved_fingerprint"] = fingerprint
+        get_autosaver().submit(st.session_state['user_id'], st.session_state['password'], snapshot)
+
+@st.fragment(run_every=2)
+def render_autosave_status():
+    """Small indicator of the last background save, refreshed in place."""
+    status = get_autosaver().status(st.session_state['user_id'])
+    if status is None:
+        st.caption("☁️ Autosave on")
+        return
+    state, when, message = status
+    when = datetime.datetime.fromtimestamp(when).strftime("%H:%M:%S")
+    if state == "saved":
+        st.caption(f"☁️ Saved at {when}")
+    elif state == "retrying":
+        st.caption(f"⚠️ Save failed, retrying ({message})")
+    elif state == "failed":
+        st.caption(f"❌ Autosave failed at {when}: {message}")
+    else:
+        st.caption("⏳ Saving…")
+
 def load_state_from_s3(user_id, password):
     """Load state from S3 and decrypt."""
     try:
-        # Get file from S3
-        response = s3_client.get_object(
-            Bucket=S3_BUCKET_NAME,
-            Key=f"user_data/{user_id}.enc"
-        )
-        
-        # Get encrypted data and metadata
-        encrypted_data = response['Body'].read()
-        metadata = response['Metadata']
+        # Get encrypted data and metadata (conditional on the cached ETag)
+        encrypted_data, metadata = fetch_profile_blob(user_id)
         salt = base64.b64decode(metadata['salt'])
         
         # Decrypt data
         data = decrypt_data(encrypted_data, password, salt)
+        # Reject malformed tables before anything in the session changes
+        for k, validate in (("cash_events", validate_events), ("other_members", validate_members),
+                            ("stress_shocks", validate_shocks)):
+            if k in data:
+                data[k] = validate(data[k])
         
         # Update session state
         for k, v in data.items():
@@ -114,6 +197,11 @@ def load_state_from_s3(user_id, password):
         
         # Store user_id in session state
         st.session_state['user_id'] = user_id
+        # Show the loaded tables in fresh editors
+        st.session_state["_tables_version"] = st.session_state.get("_tables_version", 0) + 1
+        # Nothing to autosave until the loaded profile is edited
+        snapshot = profile_snapshot()
+        st.session_state["_autosaved_fingerprint"] = profile_fingerprint(snapshot, sorted(snapshot))
         return True
     except Exception as e:
         st.error(f"Error loading state: {e}")
@@ -135,6 +223,7 @@ def render_data_management_ui():
             password = st.text_input(
                 "Password for encryption", 
                 type="password",
+                key="password",
                 help="Enter your password to save or load data"
             )
             
@@ -156,6 +245,14 @@ def render_data_management_ui():
                         if load_state_from_s3(st.session_state['user_id'], password):
                             st.success("Data loaded!")
             
+            st.checkbox("Autosave", key="autosave",
+                        help="Save automatically in the background a couple of seconds after you stop editing")
+            if st.session_state.autosave:
+                if password:
+                    render_autosave_status()
+                else:
+                    st.caption("Enter your password to turn on autosave")
+            
             st.markdown("<small>Save your Data ID somewhere secure - you'll need it to access your data on other devices.</small>", unsafe_allow_html=True)
         
         else:
@@ -239,9 +336,12 @@ def render_sidebar_ui():
     # Render each section of the sidebar
     render_income_section()
     render_spending_section()
+    render_events_section()
     render_timing_section()
+    render_household_section()
     render_portfolio_section()
     render_rates_section()
+    render_stress_section()
 
 
 def render_income_section():
@@ -264,7 +364,7 @@ def render_income_section():
         with col2:
             st.number_input("Savings Spouse", step=1000, key="current_contribution_spouse",
                           help="Monthly amount saved during working years",
-                          label_visibility="collapsed")
+                          label_visibility="collapsed", disabled=not st.session_state.has_spouse)
             
         # Retirement income  
         st.markdown("Retirement Income ($/mo)", unsafe_allow_html=True)
@@ -276,7 +376,7 @@ def render_income_section():
         with col2:
             st.number_input("Retire Inc Spouse", step=1000, key="retire_income_spouse",
                           help="Monthly pension or annuity income",
-                          label_visibility="collapsed")
+                          label_visibility="collapsed", disabled=not st.session_state.has_spouse)
             
         # Social Security
         st.markdown("Social Security Income ($/mo)", unsafe_allow_html=True)
@@ -288,7 +388,7 @@ def render_income_section():
         with col2:
             st.number_input("SSI Spouse", step=1000, key="socsec_income_spouse",
                           help="Expected monthly Social Security benefit",
-                          label_visibility="collapsed")
+                          label_visibility="collapsed", disabled=not st.session_state.has_spouse)
 
 def render_spending_section():
     """Render the spending section of the sidebar"""
@@ -303,6 +403,94 @@ def render_spending_section():
         st.number_input("Assisted Living Spend ($/mo)", step=1000, key="retire_assisted",
                     help="Monthly assisted living or care costs")
 
+        st.radio("Luxury Spend Policy", SPENDING_POLICIES, key="spending_policy",
+                 help="Stocks beat inflation: luxury spend only in months where stocks out-earn inflation. "
+                      "Guardrails: luxury spend cut or raised 10% when the withdrawal rate drifts 20% from where it started. "
+                      "Percent of portfolio: spend a fixed share of the portfolio each year. "
+                      "Floor and ceiling: percent of portfolio, with luxury spend kept within limits")
+
+        if st.session_state.spending_policy in ("Percent of portfolio", "Floor and ceiling"):
+            st.number_input("Annual Spend Rate (% of portfolio)", step=0.25, min_value=0.5, max_value=15.0,
+                            key="spending_rate", help="Need and care costs are always paid; luxury spend is what the rate allows beyond them")
+
+        if st.session_state.spending_policy == "Floor and ceiling":
+            st.number_input("Luxury Floor (% of planned)", step=10, min_value=0, max_value=100, key="spending_floor")
+            st.number_input("Luxury Ceiling (% of planned)", step=10, min_value=100, max_value=500, key="spending_ceiling")
+
+
+def table_editor(key, fields, column_config, date_fields=()):
+    """Editable table for a profile list of records; returns the edited DataFrame.
+
+    The editor keeps its edits relative to the table it was first given, so it is
+    only handed a new table (under a new key) when a profile is loaded.
+    """
+    version = st.session_state.setdefault("_tables_version", 0)
+    if st.session_state.get(f"_{key}_table_version") != version:
+        table = pd.DataFrame(st.session_state[key], columns=fields)
+        for field in date_fields:  # saved as ISO strings
+            table[field] = pd.to_datetime(table[field]).dt.date
+        st.session_state[f"_{key}_table"] = table
+        st.session_state[f"_{key}_table_version"] = version
+    return st.data_editor(st.session_state[f"_{key}_table"], key=f"_{key}_editor_{version}", num_rows="dynamic",
+                          hide_index=True, use_container_width=True, column_config=column_config)
+
+
+def render_events_section():
+    """Render the one-off cash-flow events table"""
+    with st.sidebar.expander("🗓️ One-off Events", expanded=False):
+        edited = table_editor("cash_events", EVENT_FIELDS, {
+            "name": st.column_config.TextColumn("Event"),
+            "amount": st.column_config.NumberColumn("Amount ($)", step=1000, format="%d",
+                                                    help="Money in is positive, costs are negative"),
+            "date": st.column_config.DateColumn("Date"),
+            "months": st.column_config.NumberColumn("Months", min_value=1, step=1,
+                                                    help="Paid monthly for this many months"),
+            "every": st.column_config.NumberColumn("Every (yrs)", min_value=0, step=1,
+                                                   help="Years between repeats"),
+            "times": st.column_config.NumberColumn("Times", min_value=1, step=1,
+                                                   help="Number of occurrences"),
+            "inflation": st.column_config.CheckboxColumn("Inflation", help="Amount in today's dollars, grown with inflation"),
+        }, date_fields=("date",))
+        # Rows need an amount and a date; other blank cells take their defaults
+        rows = [
+            {k: (EVENT_DEFAULTS[k] if pd.isna(row[k]) else
+                 pd.Timestamp(row[k]).date().isoformat() if k == "date" else
+                 str(row[k]) if k == "name" else
+                 bool(row[k]) if k == "inflation" else
+                 float(row[k]) if k == "amount" else int(row[k])) for k in EVENT_FIELDS}
+            for _, row in edited.iterrows() if not pd.isna(row["amount"]) and not pd.isna(row["date"])
+        ]
+        events = []
+        for event in rows:
+            try:
+                events.extend(validate_events([event]))
+            except ValueError as e:
+                st.warning(f"Leaving out {event['name'] or 'an event'}: {e}")
+        st.session_state.cash_events = events
+        st.caption("E.g. a home sale, college tuition for 48 months, or a car every 8 years.")
+
+
+def render_stress_section():
+    """Render the stress-test settings and user-defined shocks"""
+    with st.sidebar.expander("🧪 Stress Tests", expanded=False):
+        st.checkbox("Overlay stress scenarios", key="stress_tests",
+                    help="Replay named historical crises, and the shocks below, against the historical average")
+        st.radio("Stress years begin", STRESS_STARTS, key="stress_start", horizontal=True,
+                 help="At the later retirement date, or today")
+        edited = table_editor("stress_shocks", SHOCK_FIELDS, {
+            "name": st.column_config.TextColumn("Shock"),
+            "asset": st.column_config.SelectboxColumn("Asset", options=RATE_COLUMNS),
+            "return": st.column_config.NumberColumn("Return (%)", min_value=-99, max_value=200, step=5,
+                                                    help="Annual return for that year"),
+            "year": st.column_config.NumberColumn("Year", min_value=0, step=1,
+                                                  help="Years after the stress start; 0 is the first"),
+        })
+        st.session_state.stress_shocks = [
+            {"name": "" if pd.isna(row["name"]) else str(row["name"]), "asset": row["asset"],
+             "return": float(row["return"]), "year": 0 if pd.isna(row["year"]) else int(row["year"])}
+            for _, row in edited.iterrows() if row["asset"] in RATE_COLUMNS and not pd.isna(row["return"])
+        ]
+
 
 def render_timing_section():
     """Render the timing section of the sidebar"""
@@ -329,26 +517,67 @@ def render_timing_section():
 
         # Spouse timing inputs
         st.markdown("<br><b style='color:#093824'>Spouse</b><br>", unsafe_allow_html=True)
-        
+        st.checkbox("Include spouse", key="has_spouse", help="Clear for a single filer; the spouse's inputs are then ignored")
+        spouse_off = not st.session_state.has_spouse
+
         st.date_input("Birthday", key="birthday_spouse", min_value=min_birthdate, max_value=today_date,
-                     help="Your spouse's date of birth")
+                     help="Your spouse's date of birth", disabled=spouse_off)
         st.date_input("Retirement Date", key="retire_date_spouse", min_value=min_retiredate, max_value=max_retire_date_spouse,
-                     help="When your spouse plans to retire")
+                     help="When your spouse plans to retire", disabled=spouse_off)
         st.date_input("Pension/distribution start date", key="pension_date_spouse", min_value=min_retiredate, max_value=max_retire_date_spouse,
-                     help="When spouse's pension or distributions begin")
+                     help="When spouse's pension or distributions begin", disabled=spouse_off)
         st.date_input("Social security start date", key="socsec_date_spouse", min_value=min_retiredate, max_value=max_retire_date_spouse,
-                     help="When your spouse will begin taking Social Security")
+                     help="When your spouse will begin taking Social Security", disabled=spouse_off)
         
         col1, col2 = st.columns(2)
         with col1:
             st.number_input("Assisted Living Age", key="assisted_age_spouse", step=1,
-                           help="Age when spouse might need assisted living")
+                           help="Age when spouse might need assisted living", disabled=spouse_off)
         with col2:
             st.number_input("Life Expectancy", key="life_expectancy_spouse", step=1,
-                           help="Spouse's estimated life expectancy")
+                           help="Spouse's estimated life expectancy", disabled=spouse_off)
         
         st.markdown("<br><small style='color:#093824'>Use 2020/01/01 for retirement, pension, and social security dates in the past.</small><br>", unsafe_allow_html=True)
 
+        st.checkbox("Stochastic longevity", key="stochastic_longevity",
+                    help="In Simulation and Historical Sequences, sample every lifetime on every path from a mortality table instead of using the life expectancies above")
+        if st.session_state.stochastic_longevity:
+            st.radio("Mortality table (self)", MORTALITY_TABLES, key="mortality_table_self", horizontal=True)
+            st.radio("Mortality table (spouse)", MORTALITY_TABLES, key="mortality_table_spouse", horizontal=True,
+                     disabled=spouse_off)
+
+
+def render_household_section():
+    """Render the table of other household members, such as parents or adult children"""
+    with st.sidebar.expander("👪 Other Household Members", expanded=False):
+        edited = table_editor("other_members", MEMBER_FIELDS, {
+            "name": st.column_config.TextColumn("Name"),
+            "birthday": st.column_config.DateColumn("Birthday"),
+            "retire_date": st.column_config.DateColumn("Retirement"),
+            "pension_date": st.column_config.DateColumn("Pension start"),
+            "socsec_date": st.column_config.DateColumn("SS start"),
+            "current_contribution": st.column_config.NumberColumn("Savings ($/mo)", min_value=0, step=100, format="%d"),
+            "retire_income": st.column_config.NumberColumn("Retire Inc ($/mo)", min_value=0, step=100, format="%d"),
+            "socsec_income": st.column_config.NumberColumn("SSI ($/mo)", min_value=0, step=100, format="%d"),
+            "assisted_age": st.column_config.NumberColumn("Assisted age", min_value=0, step=1),
+            "life_expectancy": st.column_config.NumberColumn("Life exp.", min_value=0, step=1),
+            "mortality_table": st.column_config.SelectboxColumn("Mortality", options=MORTALITY_TABLES),
+        }, date_fields=MEMBER_DATES)
+        # Rows need a birthday; blank dates fall on it and other blank cells take their defaults
+        members = []
+        for _, row in edited.iterrows():
+            if pd.isna(row["birthday"]):
+                continue
+            member = {k: (MEMBER_DEFAULTS[k] if pd.isna(row[k]) else
+                          str(row[k]) if k in ("name", "mortality_table") else
+                          float(row[k])) for k in MEMBER_FIELDS if k not in MEMBER_DATES}
+            for k in MEMBER_DATES:
+                member[k] = pd.Timestamp(row["birthday" if pd.isna(row[k]) else k]).date().isoformat()
+            members.append(member)
+        st.session_state.other_members = members
+        st.caption("Everyone else whose income and costs the household carries, e.g. a parent or an adult child. "
+                   "Care costs are the Assisted Living Spend per person in care.")
+
 def render_portfolio_section():
     """Render the portfolio section of the sidebar"""
     with st.sidebar.expander("💰 Portfolio", expanded=False):
@@ -391,6 +620,56 @@ def render_portfolio_section():
         with col2:
             st.markdown("<div style='padding-top:33px'>%</div>", unsafe_allow_html=True)
 
+        st.radio("Glide Path", GLIDE_PATHS, key="glide_path",
+                 help="Step at retirement: switch allocations when the later of you retires. "
+                      "Linear to retirement: move from the before to the after allocation evenly until then. "
+                      "Age in bonds: hold your age in bonds, less an offset. "
+                      "Custom: interpolate stock allocations set by age")
+        if st.session_state.glide_path == "Age in bonds":
+            st.number_input("Stocks = N minus your age", key="age_in_bonds_base", step=5, min_value=50, max_value=150,
+                            help="100 holds your age in bonds; 110 or 120 hold more stocks")
+        elif st.session_state.glide_path == "Custom":
+            st.text_input("Stock allocation by age", key="glide_custom",
+                          help="Comma-separated age: stock % points, e.g. 50: 80, 65: 50, 85: 30")
+            try:
+                parse_glide_points(st.session_state.glide_custom)
+            except ValueError as e:
+                st.error(str(e))
+
+        st.radio("Rebalancing", REBALANCING, key="rebalancing",
+                 help="Monthly or Annual: trade back to target on that calendar. "
+                      "Threshold: trade back to target once stocks drift beyond the band. "
+                      "Cost-aware: trade only back to the edge of the band, keeping turnover low")
+        if st.session_state.rebalancing in ("Threshold", "Cost-aware"):
+            st.number_input("Rebalancing Band (± % points)", key="rebalance_band", step=1, min_value=1, max_value=25)
+        st.number_input("Trading Cost (basis points)", key="trading_cost", step=5, min_value=0, max_value=200,
+                        help="Cost of each rebalancing trade, per dollar bought or sold")
+
+        st.markdown("<br><b style='color:#093824'>Accounts and Taxes</b><br>", unsafe_allow_html=True)
+        st.checkbox("Tax-aware accounts", key="tax_aware",
+                    help="Split investments into taxable, tax-deferred and Roth accounts, with federal income tax, "
+                         "capital gains tax and required minimum distributions")
+        if st.session_state.tax_aware:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.number_input("Tax-deferred (%)", key="deferred_pct", step=5, min_value=0, max_value=100,
+                                help="Share of investments in 401(k)s and traditional IRAs")
+            with col2:
+                st.number_input("Roth (%)", key="roth_pct", step=5, min_value=0, max_value=100,
+                                help="Share of investments in Roth accounts")
+            taxable_pct = 100 - st.session_state.deferred_pct - st.session_state.roth_pct
+            if taxable_pct < 0:
+                st.error("Tax-deferred and Roth shares add up to more than 100%.")
+            else:
+                st.caption(f"Taxable: {taxable_pct}% of investments")
+            st.radio("Withdrawal Order", list(WITHDRAWAL_ORDERS), key="withdrawal_order")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.number_input("Gains in taxable (%)", key="taxable_gain_pct", step=10, min_value=0, max_value=100,
+                                help="Share of each taxable withdrawal that is a capital gain")
+            with col2:
+                st.number_input("Capital gains rate (%)", key="capital_gains_rate", step=5, min_value=0, max_value=30)
+
 def render_rates_section():
     """Render the rates section of the sidebar"""
     # Hide selectbox label visually
@@ -399,10 +678,49 @@ def render_rates_section():
     with st.sidebar.expander("📈 Rates", expanded=False):
         st.markdown("<br><b>Enter static values, use historical averages from 1928-2024, or see a simulation using past rates</b><br>", unsafe_allow_html=True)
         
-        rate_mode = st.selectbox(" ", ["User Input", "Historical", "Simulation"], 
+        rate_mode = st.selectbox(" ", ["User Input", "Historical", "Simulation", "Historical Sequences"], 
                                index=2, key="rate_mode",
                                help="Choose how to model future returns")
 
+        if rate_mode != "User Input":
+            st.slider("Historical window", min_value=window_years[0], max_value=window_years[1],
+                      key="rate_window", help="Years of history used for averages and sampling")
+            if rates_error is None:
+                window = rate_stats.window(*st.session_state.rate_window)
+                st.dataframe(pd.DataFrame(window.summary()), use_container_width=True)
+            available = ", ".join(source_store.asset_columns)
+            st.text_input("Stock assets", key="stock_assets",
+                          help=f"Assets and weights making up stocks, e.g. 'Stocks: 70, International: 30'. In the data: {available}")
+            st.text_input("Bond assets", key="bond_assets",
+                          help=f"Assets and weights making up bonds. In the data: {available}")
+
+        if rate_mode == "Simulation":
+            st.number_input("Scenarios", key="n_simulations", step=10, min_value=10, max_value=10000,
+                            help="Number of sampled market paths")
+            st.radio("Return model", RETURN_MODELS, key="return_model", horizontal=True,
+                     help="Resample actual historical years, or draw from a lognormal or fat-tailed Student-t fitted to the window")
+            if st.session_state.return_model == "Student-t":
+                st.number_input("Degrees of freedom", key="t_degrees_of_freedom", step=1, min_value=3, max_value=30,
+                                help="Lower values give fatter tails")
+            st.radio("Sampling method", SAMPLING_METHODS, key="sampling_method", horizontal=True,
+                     help="Antithetic and stratified sampling give steadier percentile bands from fewer scenarios")
+            if st.session_state.return_model != "Historical resample" and st.session_state.sampling_method == "Stratified":
+                st.caption("Stratified sampling applies to historical resampling; fitted models draw independently.")
+            st.checkbox("Common random numbers", key="common_random_numbers",
+                        help="Reuse the same market draws across reruns, so changing an input is compared on identical paths")
+            if st.session_state.common_random_numbers:
+                st.number_input("Random seed", key="random_seed", step=1, min_value=0)
+
+        if rate_mode in ("Simulation", "Historical Sequences"):
+            st.radio("Stored precision", ENGINE_PRECISIONS, key="engine_precision", horizontal=True,
+                     help="Float32 stores the monthly results of large scenario batches in half the memory: balances "
+                          "are still computed in float64 and only the stored values are rounded, to within about "
+                          "$1 per $10M")
+
+        if rate_mode == "Historical Sequences":
+            st.checkbox("Wrap around to the first year", key="sequence_wrap",
+                        help="Let sequences that run past the last year continue from the first; otherwise only complete sequences are shown")
+
         if rate_mode == "User Input":
             st.markdown("<br><b>Static Rate Inputs as Annual Average</b><br>", unsafe_allow_html=True)
             
@@ -431,52 +749,41 @@ def load_css(file_path):
 
 load_css("app/styles.css")
 
-@st.cache_data
 def load_external_data():
-    return pd.read_csv("app/hist_data.csv")
-
-# Cache rate table from csv file
-rate_table = load_external_data()
-
-defaults = {
-    "current_investment": 1000000,
-    "current_cash": 200000,
-    "current_contribution_self": 5000,
-    "current_contribution_spouse": 5000,
-    "retire_income_self": 4000,
-    "retire_income_spouse": 4000,
-    "socsec_income_self": 0,
-    "socsec_income_spouse": 0,
-    "retire_need_spend": 8000,
-    "retire_luxury_spend": 1000,
-    "retire_assisted": 7000,
-    "birthday_self": datetime.date(1980, 1, 1),
-    "birthday_spouse": datetime.date(1980, 1, 1),
-    "retire_date_self": datetime.date(2045, 1, 1),
-    "retire_date_spouse": datetime.date(2045, 1, 1),
-    "pension_date_self": datetime.date(2045, 1, 1),
-    "pension_date_spouse": datetime.date(2045, 1, 1),
-    "socsec_date_self": datetime.date(2045, 1, 1),
-    "socsec_date_spouse": datetime.date(2045, 1, 1),
-    "assisted_age_self": 90,
-    "assisted_age_spouse": 90,
-    "life_expectancy_self": 95,
-    "life_expectancy_spouse": 95,
-    "inflation": 2.0,
-    "return_cash": 2.0,
-    "return_stock": 11.0,
-    "return_bond": 4.5,
-    "projection_years": 30,
-    "cash_set_point": 50000,
-    "stock_allocation_pre_retirement": 80,
-    "stock_allocation_post_retirement": 50,
-    "rate_mode": "Historical",
-}
+    return get_rate_store()
+
+# Memory-mapped rate store, compiled once per CSV version and shared by every session
+source_store = load_external_data()
+rate_stats = get_rate_stats(source_store)
+
+# Scenario paths and results precomputed at container start (see warmup.py)
+preload()
+
+defaults = default_profile(rate_stats)
 
 for k, v in defaults.items():
     if k not in st.session_state:
         st.session_state[k] = v
 
+# The engine's columns for the chosen asset mix (the store itself by default), shared
+# by every session choosing the same mix; an invalid mix is reported below the sidebar
+try:
+    rate_store = mixed_store(source_store, st.session_state)
+    rates_error = None
+except ValueError as e:
+    rate_store, rates_error = source_store, str(e)
+rate_stats = get_rate_stats(rate_store)
+# The saved window is kept as entered; years outside the mix's data are left out of
+# the averages and draws, and a window with none of them is reported below the sidebar
+window_years = (min(rate_stats.first_year, defaults["rate_window"][0], st.session_state.rate_window[0]),
+                max(rate_stats.last_year, defaults["rate_window"][1], st.session_state.rate_window[1]))
+if rates_error is None and st.session_state.rate_mode != "User Input":
+    try:
+        rate_stats.indices(*st.session_state.rate_window)
+    except ValueError:
+        rates_error = (f"the historical window has none of the asset mix's years "
+                           f"({rate_stats.first_year}–{rate_stats.last_year})")
+
 today_date = datetime.date.today()
 min_birthdate = datetime.date(1925, 1, 1)
 min_retiredate = datetime.date(2000, 1, 1)
@@ -485,10 +792,6 @@ min_retiredate = datetime.date(2000, 1, 1)
 max_retire_date_self = st.session_state["birthday_self"] + datetime.timedelta(days=365 * st.session_state["life_expectancy_self"])
 max_retire_date_spouse = st.session_state["birthday_spouse"] + datetime.timedelta(days=365 * st.session_state["life_expectancy_spouse"])
 
-# --- Convert dates to age
-def age_on_date(birthdate, date):
-    return (date - birthdate).days // 365
-
 # --- Streamlit App ---
 st.title("Retirement Savings Model")
 
@@ -498,193 +801,76 @@ render_data_management_ui()
 # Add the sidebar UI to the sidebar 
 render_sidebar_ui()
 
-# --- Calculations ---
-
-# --- Time Setup
-# Calculate end date as the latest expected death
-end_date_self = st.session_state.birthday_self.replace(year=st.session_state.birthday_self.year + st.session_state.life_expectancy_self)
-end_date_spouse = st.session_state.birthday_spouse.replace(year=st.session_state.birthday_spouse.year + st.session_state.life_expectancy_spouse)
+# Autosave only now that the sidebar has read its tables back into session state
+if st.session_state.get('user_id') and st.session_state.get('autosave') and st.session_state.get('password'):
+    autosave_if_changed()
 
-final_date = max(end_date_self, end_date_spouse)
-months = max((final_date.year - datetime.date.today().year) * 12 + (final_date.month - datetime.date.today().month),0)
+if rates_error:
+    st.warning(f"Fix the asset mix or window in the Rates section to see results: {rates_error}")
+    st.stop()
 
-dates = np.array([datetime.date.today() + datetime.timedelta(days=30*i) for i in range(months)])
+# --- Calculations ---
 
-# Initialize rates
-r_stock = np.zeros(months)
-r_bond = np.zeros(months)
-r_cash = np.zeros(months)
-r_infl = np.zeros(months)
+# --- Time Setup
+# Monthly timeline from today until the latest expected death
+months = horizon_months(st.session_state)
+dates = month_dates(months)
+
+# Income and spending schedule shared by every scenario
+if st.session_state.tax_aware and st.session_state.deferred_pct + st.session_state.roth_pct > 100:
+    st.warning("Fix the account shares in the Portfolio section to see results.")
+    st.stop()
+if st.session_state.glide_path == "Custom":
+    try:
+        parse_glide_points(st.session_state.glide_custom)
+    except ValueError:
+        st.warning("Fix the custom glide path in the Portfolio section to see results.")
+        st.stop()
+plan = build_plan(st.session_state, dates)
+
+SCENARIO_MODES = ("Simulation", "Historical Sequences")
+
+def scenario_rng():
+    """Seeded generator under common random numbers, so every rerun sees the same draws."""
+    return np.random.default_rng(st.session_state.random_seed if st.session_state.common_random_numbers else None)
+
+def sample_rates(n_paths=1, method="Independent", rng=None, n_months=None):
+    """Draw monthly-equivalent rates for every path and month from the selected return model."""
+    return draw_scenarios(rate_store, rate_stats, st.session_state, n_paths, n_months or months, method, rng)
+
+def constant_rates(annual_rates):
+    """Broadcast one set of annual rates over every month of a single path."""
+    monthly = (1 + np.asarray(annual_rates)) ** (1/12) - 1
+    return np.broadcast_to(monthly, (1, months, len(monthly)))
+
+def mode_rates(mode="Historical"):
+    """Single-path rates for the User Input and Historical modes."""
+    if mode == "User Input":
+        return constant_rates([st.session_state.return_stock / 100, st.session_state.return_bond / 100,
+                               st.session_state.return_cash / 100, st.session_state.inflation / 100])
+    return constant_rates(rate_stats.window(*st.session_state.rate_window).geo_mean)
 
 def run_simulation(mode="Historical",rate_table_sample=None):
     if mode == "Simulation":
-        if rate_table_sample is None:
-            rate_table_sample = rate_table.sample(n=months, replace=True).reset_index(drop=True)
-        r_stock = (1 + rate_table_sample["Stocks"].values) ** (1/12) - 1
-        r_bond = (1 + rate_table_sample["Bonds"].values) ** (1/12) - 1
-        r_cash = (1 + rate_table_sample["Cash"].values) ** (1/12) - 1
-        r_infl = (1 + rate_table_sample["Inflation"].values) ** (1/12) - 1
-    elif mode == "User Input":
-        r_stock = np.full(months, (1 + st.session_state.return_stock / 100) ** (1/12) - 1)
-        r_bond = np.full(months, (1 + st.session_state.return_bond / 100) ** (1/12) - 1)
-        r_cash = np.full(months, (1 + st.session_state.return_cash / 100) ** (1/12) - 1)
-        r_infl = np.full(months, (1 + st.session_state.inflation / 100) ** (1/12) - 1)
+        rates = sample_rates() if rate_table_sample is None else rate_table_sample[np.newaxis]
     else:
-        geo_mean_annual = np.prod(1 + rate_table["Stocks"]) ** (1 / len(rate_table["Stocks"])) - 1
-        r_stock = np.full(months, (1 + geo_mean_annual) ** (1/12) - 1)
-        geo_mean_annual = np.prod(1 + rate_table["Bonds"]) ** (1 / len(rate_table["Bonds"])) - 1
-        r_bond = np.full(months, (1 + geo_mean_annual) ** (1/12) - 1)
-        geo_mean_annual = np.prod(1 + rate_table["Cash"]) ** (1 / len(rate_table["Cash"])) - 1
-        r_cash = np.full(months, (1 + geo_mean_annual) ** (1/12) - 1)
-        geo_mean_annual = np.prod(1 + rate_table["Inflation"]) ** (1 / len(rate_table["Inflation"])) - 1
-        r_infl = np.full(months, (1 + geo_mean_annual) ** (1/12) - 1)
-
-    # --- Initialize arrays
-    investment_stock = np.zeros(months)
-    investment_bond = np.zeros(months)
-    cash = np.zeros(months)
-    need_spend = np.full(months, st.session_state.retire_need_spend)
-    luxury_spend = np.zeros(months)
-    contributions = np.zeros(months)
-    retire_income = np.zeros(months)
-    assisted_spend = np.zeros(months)
-    assisted = np.full(months, st.session_state.retire_assisted)
-    age_self_series = np.zeros(months, dtype=int)
-    age_spouse_series = np.zeros(months, dtype=int)
-    total_income_series = np.zeros(months)
-    total_spend_series = np.zeros(months)
-
-    retire_self_idx = np.searchsorted(dates, st.session_state.retire_date_self)
-    retire_spouse_idx = np.searchsorted(dates, st.session_state.retire_date_spouse)
-    pension_self_idx = np.searchsorted(dates, st.session_state.pension_date_self)
-    pension_spouse_idx = np.searchsorted(dates, st.session_state.pension_date_spouse)
-    socsec_self_idx = np.searchsorted(dates, st.session_state.socsec_date_self)
-    socsec_spouse_idx = np.searchsorted(dates, st.session_state.socsec_date_spouse)
-
-
-    for i, d in enumerate(dates):
-        age_self = age_on_date(st.session_state.birthday_self, d)
-        age_self_series[i] = age_self
-        age_spouse = age_on_date(st.session_state.birthday_spouse, d)
-        age_spouse_series[i] = age_spouse
-
-        if age_self < st.session_state.life_expectancy_self:
-            if i < retire_self_idx:
-                contributions[i] += st.session_state.current_contribution_self
-            if i >= pension_self_idx:
-                retire_income[i] += st.session_state.retire_income_self
-            if i >= socsec_self_idx:
-                retire_income[i] += st.session_state.socsec_income_self
-
-        if age_spouse < st.session_state.life_expectancy_spouse:
-            if i < retire_spouse_idx:
-                contributions[i] += st.session_state.current_contribution_spouse
-            if i >= pension_spouse_idx:
-                retire_income[i] += st.session_state.retire_income_spouse
-            if i >= socsec_spouse_idx:
-                retire_income[i] += st.session_state.socsec_income_spouse
-
-
-        if age_self >= st.session_state.assisted_age_self and age_self <= st.session_state.life_expectancy_self:
-            assisted_spend[i] += assisted[i]
-        if age_spouse >= st.session_state.assisted_age_spouse and age_spouse <= st.session_state.life_expectancy_spouse:
-            assisted_spend[i] += assisted[i]
-
-        # Update luxury spend monthly based on return vs inflation
-        if r_stock[i] > r_infl[i]:
-            luxury_spend[i] = st.session_state.retire_luxury_spend
-        else:
-            luxury_spend[i] = 0
-
-    stock_allocation_pre = st.session_state.stock_allocation_pre_retirement / 100
-    stock_allocation_post = st.session_state.stock_allocation_post_retirement / 100
-
-    investment_stock[0] = st.session_state.current_investment * stock_allocation_pre
-    investment_bond[0] = st.session_state.current_investment * (1 - stock_allocation_pre)
-    cash[0] = st.session_state.current_cash
-
-    for i in range(1, months):
-        total_spend = need_spend[i] + luxury_spend[i] + assisted_spend[i]
-        total_income = retire_income[i] + contributions[i]
-
-        total_spend_series[i] = total_spend
-        total_income_series[i] = total_income
-
-        net = total_income - total_spend
-        new_cash = cash[i-1]
-        new_stock = investment_stock[i-1]
-        new_bond = investment_bond[i-1]
-
-        total_invest = new_stock + new_bond
-
-        if net >= 0:
-            new_cash += net
-        else:
-            cash_used = min(new_cash, -net)
-            inv_needed = -net - cash_used
-            new_cash -= cash_used
-            total_invest = max(0, total_invest - inv_needed)
-
-        if new_cash < st.session_state.cash_set_point and total_invest > 0:
-            transfer = min(st.session_state.cash_set_point - new_cash, total_invest)
-            new_cash += transfer
-            total_invest -= transfer
-
-        # Re-allocate investments based on retirement status
-        is_retired = i >= max(retire_self_idx, retire_spouse_idx)
-        stock_ratio = stock_allocation_post if is_retired else stock_allocation_pre
-
-        investment_stock[i] = total_invest * stock_ratio * (1 + r_stock[i])
-        investment_bond[i] = total_invest * (1 - stock_ratio) * (1 + r_bond[i])
-        cash[i] = new_cash * (1 + r_cash[i])
-
-    # --- Adjust all to today's dollars (real dollars)
-    discount_factors = 1 / np.cumprod(1 + r_infl)
-    investment_stock *= discount_factors
-    investment_bond *= discount_factors
-    cash *= discount_factors
-
-    total_investment = investment_stock + investment_bond
-
-    return pd.DataFrame({
-        "Date": dates,
-        "Investment": np.round(total_investment,0),
-        "Cash": np.round(cash,0),
-        "Total": np.round(total_investment,0) + np.round(cash,0),
-        "Spend": np.round(total_spend_series,0),
-        "Income": np.round(total_income_series,0),
-        "age_self": age_self_series,
-        "age_spouse": age_spouse_series,
-        "Savings": np.round(contributions,0),
-        "Retirement Income": np.round(retire_income,0),
-        "Assisted": np.round(assisted_spend,0),
-    })
-
-with st.spinner("Running simulations..."):
-    if st.session_state.rate_mode == "Simulation":
-        results = run_simulation(mode="Historical")
-        last_value = results['Total'].iloc[-1]
-        
-        n_simulations = 100
-        all_totals = []
-        for _ in range(n_simulations):
-            sample = rate_table.sample(n=months, replace=True).reset_index(drop=True)
-            sim_result = run_simulation(mode=st.session_state.rate_mode,rate_table_sample=sample)
-            all_totals.append(sim_result["Total"].values)
-
-        simulation_df = pd.DataFrame(all_totals).T  # Transpose so rows = months, columns = runs
-        simulation_df.insert(0, "Month", sim_result["Date"])  # Add dates as first column
-        simulation_df.insert(1, "Historical", results["Total"])  # Add dates as first column
-        median_series = simulation_df.iloc[:, 2:].median(axis=1)
-        last_value_likely = median_series.iloc[-1]
-
-    else:
-        n_simulations = 1
-        results = run_simulation(mode=st.session_state.rate_mode)
-        last_value = results['Total'].iloc[-1]
+        rates = mode_rates(mode)
+
+    paths = simulate(plan, rates, policy=spending_policy(st.session_state))
+    return SimulationResults(
+        dates=dates,
+        investment=paths.investment[0],
+        cash=paths.cash[0],
+        spend=paths.spend[0],
+        income=paths.income[0],
+        savings=plan.contributions,
+        retirement_income=plan.retire_income,
+        assisted=plan.assisted_spend,
+        ages={f"age_{name}": ages for name, ages in zip(household(st.session_state).names, plan.ages)},
+    )
 
-def plot_outcome(mode="Historical",results=None):
-    if mode == "Simulation":
+def plot_outcome(mode="Historical",results=None,stress=None):
+    if mode in SCENARIO_MODES:
         p10 = results.iloc[:, 2:].quantile(0.10, axis=1)
         p25 = results.iloc[:, 2:].quantile(0.25, axis=1)
         p75 = results.iloc[:, 2:].quantile(0.75, axis=1)
@@ -701,29 +887,185 @@ def plot_outcome(mode="Historical",results=None):
         ax.plot(dates, historical / 1e6, color="red", label="Historical", linewidth=2)
         ax.set_xlabel("Year")
         ax.set_ylabel("Portfolio Value ($M)")
-        ax.legend()
 
     else:
         fig, ax = plt.subplots(figsize=(12, 4))
-        ax.plot(results["Date"], results["Total"] / 1e6, color="blue",label="Total Savings", linewidth=2)
+        ax.plot(results.dates, results.total / 1e6, color="blue",label="Total Savings", linewidth=2)
         ax.set_xlabel("Date")
         ax.set_ylabel("Balance ($)")
-        ax.legend()
 
+    # Stress scenarios as thin dashed overlays: (names, dates, totals)
+    if stress is not None:
+        names, when, totals = stress
+        for name, row in zip(names, totals):
+            ax.plot(when, row / 1e6, linestyle="--", linewidth=1.2, label=name)
+    ax.legend(fontsize="small" if stress is not None else None)
+
+    return fig
+
+def plot_tornado(base, report):
+    """Tornado chart of each input's effect on success rate and median terminal value."""
+    report = report.iloc[::-1]  # largest effect at the top
+    labels = [f"{name} ({low} / {high})" for name, low, high in zip(report["Input"], report["Low"], report["High"])]
+    fig, axes = plt.subplots(1, 2, figsize=(12, 0.35 * len(report) + 1.2), sharey=True)
+    for ax, column, center, scale, title in (
+        (axes[0], "Success", base["success_rate"], 100, "Change in success rate (percentage points)"),
+        (axes[1], "Median", base["median"], 1e-6, "Change in median terminal value ($M)"),
+    ):
+        ax.barh(labels, (report[f"{column} (low)"] - center) * scale, color="#C0392B", alpha=0.7, label="Input lowered")
+        ax.barh(labels, (report[f"{column} (high)"] - center) * scale, color="#28A745", alpha=0.7, label="Input raised")
+        ax.axvline(0, color="#093824", linewidth=1)
+        ax.set_xlabel(title)
+    axes[1].legend(loc="lower right")
+    fig.tight_layout()
+    return fig
+
+def plot_claiming(claiming):
+    """Heatmap of the optimizer's objective over both spouses' claiming ages."""
+    grid = claiming.success * 100 if claiming.objective == OBJECTIVES[0] else claiming.median / 1e6
+    fig, ax = plt.subplots(figsize=(7, 5))
+    image = ax.imshow(grid, origin="lower", aspect="auto", cmap="Greens",
+                      extent=(claiming.ages_spouse[0] / 12, (claiming.ages_spouse[-1] + 1) / 12,
+                              claiming.ages_self[0] / 12, (claiming.ages_self[-1] + 1) / 12))
+    best = claiming.best
+    ax.plot((claiming.ages_spouse[best[1]] + 0.5) / 12, (claiming.ages_self[best[0]] + 0.5) / 12,
+            marker="*", color="#C0392B", markersize=14, label="Best")
+    if claiming.current is not None:
+        ax.plot((claiming.ages_spouse[claiming.current[1]] + 0.5) / 12,
+                (claiming.ages_self[claiming.current[0]] + 0.5) / 12,
+                marker="o", color="#093824", markersize=8, label="Current")
+    ax.set_xlabel("Spouse claiming age")
+    ax.set_ylabel("Self claiming age")
+    fig.colorbar(image, ax=ax, label="Success rate (%)" if claiming.objective == OBJECTIVES[0] else "Median terminal value ($M)")
+    ax.legend(loc="lower right")
+    fig.tight_layout()
     return fig
 
+def scenario_frame(totals, historical, when, labels=None):
+    """Scenario totals laid out for plot_outcome: rows = time, columns = Month, Historical, runs."""
+    frame = pd.DataFrame(np.round(totals).T, columns=labels)
+    frame.insert(0, "Month", when)  # Add dates as first column
+    frame.insert(1, "Historical", np.round(historical))  # Add the historical average path
+    return frame
+
+def cached_sample_rates(n_paths, method, n_months):
+    """Seeded draws are identical for every session asking for them, so share them process-wide."""
+    if not st.session_state.common_random_numbers:
+        return sample_rates(n_paths, method, scenario_rng(), n_months)
+    key = scenario_key(rate_store, st.session_state, n_months, n_paths, method)
+    return path_cache.get_or_compute(key, lambda: sample_rates(n_paths, method, scenario_rng(), n_months))
+
+def longevity_rng():
+    """Lifetimes get their own stream, seeded alongside the market draws under common random numbers."""
+    return np.random.default_rng([st.session_state.random_seed, 1] if st.session_state.common_random_numbers else None)
+
+# With stochastic longevity every scenario path has its own lifetimes, so scenarios
+# run to the mortality table's last age and each path's flows are masked by its deaths
+longevity = st.session_state.stochastic_longevity and st.session_state.rate_mode in SCENARIO_MODES
+scenario_months = longevity_horizon(st.session_state) if longevity else months
+scenario_dates = month_dates(scenario_months) if longevity else dates
+
+if st.session_state.rate_mode == "Simulation":
+    n_simulations = st.session_state.n_simulations
+    scenario_rates = cached_sample_rates(n_simulations, st.session_state.sampling_method, scenario_months)
+    scenario_labels = None
+elif st.session_state.rate_mode == "Historical Sequences":
+    # Every starting year in the window, replayed in order as one batch
+    lo, hi = rate_stats.indices(*st.session_state.rate_window)
+    start_rows, scenario_rates = historical_sequences(rate_store.monthly, scenario_months, lo, hi,
+                                                      wrap=st.session_state.sequence_wrap)
+    scenario_labels = rate_store.years[start_rows]
+    n_simulations = len(start_rows)
+else:
+    n_simulations = 1
+
+if longevity:
+    deaths = death_dates(st.session_state, n_simulations, longevity_rng())
+    scenario_plan = build_plan(st.session_state, scenario_dates, deaths)
+    last_month = last_alive_month(scenario_dates, deaths)
+else:
+    scenario_plan = plan
+
+def run_scenarios():
+    """Every scenario path, stored in the chosen precision."""
+    policy = spending_policy(st.session_state)
+    if st.session_state.engine_precision == "Float32":
+        return simulate_float32(scenario_plan, scenario_rates, policy=policy)[0]
+    return simulate(scenario_plan, scenario_rates, policy=policy)
+
+# While inputs are changing, show a quick annual-step preview first; the monthly
+# engine replaces it below (or a newer rerun interrupts it, if the user keeps editing)
+input_fingerprint = profile_fingerprint(st.session_state, defaults)
+inputs_changed = st.session_state.get("_preview_inputs") != input_fingerprint
+st.session_state["_preview_inputs"] = input_fingerprint
+preview_slot = st.empty()
+# (the annual engine only models the default luxury rule, monthly rebalancing and no taxes)
+if (inputs_changed and st.session_state.rate_mode in SCENARIO_MODES and n_simulations and months
+        and st.session_state.spending_policy == SPENDING_POLICIES[0] and not longevity
+        and st.session_state.rebalancing == "Monthly" and not st.session_state.tax_aware):
+    preview = simulate_annual(plan, scenario_rates)
+    preview_baseline = simulate_annual(plan, mode_rates("Historical"))
+    with preview_slot.container():
+        st.caption("Preview (annual steps), refining…")
+        st.pyplot(plot_outcome(mode=st.session_state.rate_mode,
+                               results=scenario_frame(preview.total, preview_baseline.total[0],
+                                                      dates[preview.index], scenario_labels)),
+                  use_container_width=True)
+
+with st.spinner("Running simulations..."):
+    if st.session_state.rate_mode in SCENARIO_MODES:
+        results = run_simulation(mode="Historical")
+        last_value = results.final_total
+
+        # Deterministic draws give deterministic totals, so identical inputs share one result
+        # (historical sequences are fixed, but sampled lifetimes are only seeded with common random numbers)
+        if st.session_state.common_random_numbers or (st.session_state.rate_mode == "Historical Sequences"
+                                                       and not longevity):
+            scenario_totals = path_cache.get_or_compute(totals_key(rate_store, input_fingerprint, today_date),
+                                                        lambda: run_scenarios().total)
+        else:
+            scenario_totals = run_scenarios().total
+
+        if longevity and n_simulations and scenario_months:
+            bequest, outlived = outcomes(scenario_totals, last_month)
+            # Each path ends at its last death; chart the bands while most households are still alive
+            shown = int(np.quantile(last_month, 0.95)) + 1
+            living = np.where(np.arange(shown) <= last_month[:, None], scenario_totals[:, :shown], np.nan)
+            baseline = np.full(shown, np.nan)
+            baseline[:min(shown, months)] = results.total[:shown]
+            simulation_df = scenario_frame(living, baseline, scenario_dates[:shown], scenario_labels)
+            last_value_likely = np.median(bequest)
+        else:
+            simulation_df = scenario_frame(scenario_totals, results.total, dates, scenario_labels)
+            median_series = simulation_df.iloc[:, 2:].median(axis=1)
+            last_value_likely = median_series.iloc[-1] if n_simulations else last_value
+
+    else:
+        results = run_simulation(mode=st.session_state.rate_mode)
+        last_value = results.final_total
+
+    # Named crises and user shocks replayed over the deterministic baseline, all in one batch
+    stress = None
+    if st.session_state.stress_tests and months:
+        stress_baseline = mode_rates("User Input" if st.session_state.rate_mode == "User Input" else "Historical")[0]
+        stress_totals, stress_table = stress_report(plan, rate_store, st.session_state, stress_baseline,
+                                                    policy=spending_policy(st.session_state))
+        stress = (list(stress_table["Scenario"]), dates, stress_totals)
+
+preview_slot.empty()
+
 # Plot
 # Tabs for Graph and Data
 tab1, tab2, tab3 = st.tabs(["📊 Graph", "📋 Data", "⚙️ Methodology"])
 
 with tab1:
 
-    if st.session_state.rate_mode == "Simulation":
+    if st.session_state.rate_mode in SCENARIO_MODES:
         final_val = f"${last_value_likely/1e6:,.1f}M"
-        fig = plot_outcome(mode=st.session_state.rate_mode, results=simulation_df)
+        fig = plot_outcome(mode=st.session_state.rate_mode, results=simulation_df, stress=stress)
     else:
         final_val = f"${last_value/1e6:,.1f}M"
-        fig = plot_outcome(mode=st.session_state.rate_mode, results=results)
+        fig = plot_outcome(mode=st.session_state.rate_mode, results=results, stress=stress)
 
     st.markdown("##### Projected Portfolio Value")
     st.markdown(f"<div style='font-size: 0.9em; color: #28A745; font-weight: bold'>Expected value at end of life: {final_val}</div>", unsafe_allow_html=True)
@@ -732,18 +1074,124 @@ with tab1:
 
     st.pyplot(fig, use_container_width=True)
 
+    if (st.session_state.rate_mode in SCENARIO_MODES and st.session_state.engine_precision == "Float32"
+            and n_simulations and scenario_totals.dtype == np.float64):
+        st.caption("Some values couldn't be stored in float32 within tolerance, so the scenarios were stored in float64.")
+
+    if stress is not None:
+        st.markdown("##### Stress Tests")
+        st.caption(f"Each scenario follows the {'rates you entered' if st.session_state.rate_mode == 'User Input' else 'historical average'} "
+                   f"except for its stress years, which begin at {'retirement' if st.session_state.stress_start == 'Retirement' else 'today'}.")
+        st.dataframe(stress_table, use_container_width=True, hide_index=True,
+                     column_config={"Final value": st.column_config.NumberColumn(format="$%d"),
+                                    "Lowest value": st.column_config.NumberColumn(format="$%d")})
+
     # Metrics and explanatory note
     if st.session_state.rate_mode == "Simulation":
+        if st.session_state.spending_policy == SPENDING_POLICIES[0]:
+            st.caption(
+                "*Most Likely Outcome is typically higher than Historical due to how luxury spend is modeled.* "
+                "Luxury spending only occurs when stock returns exceed inflation. In historical mode, this is applied evenly; "
+                "in simulation, it's dynamically based on each month's return."
+            )      
+
+        with st.expander("Sampling accuracy"):
+            st.caption("Standard error of the end-of-life percentiles across repeated runs, by scenario count and sampling method.")
+            if st.button("Run convergence report"):
+                with st.spinner("Measuring convergence..."):
+                    report = convergence_report(
+                        terminal_values=lambda rates: simulate(plan, rates, policy=spending_policy(st.session_state)).total[:, -1],
+                        draw=lambda n, method, rng: sample_rates(n, method, rng),
+                    )
+                st.dataframe(report.round(0), use_container_width=True, hide_index=True)
+    elif st.session_state.rate_mode == "Historical Sequences" and n_simulations:
+        finals = pd.Series(bequest, index=scenario_labels) if longevity else simulation_df.iloc[-1, 2:]
+        lasted = ~outlived if longevity else finals > 0
+        st.caption(
+            f"Replayed {n_simulations} historical starting years. "
+            f"Money lasted in {lasted.mean():.0%} of them; the worst start was {finals.idxmin()} "
+            f"(${finals.min()/1e6:,.1f}M) and the best was {finals.idxmax()} (${finals.max()/1e6:,.1f}M)."
+        )
+    elif st.session_state.rate_mode == "Historical Sequences":
+        st.warning("The horizon is longer than the selected window; enable wrap-around to replay it.")
+
+    if longevity and n_simulations:
         st.caption(
-            "*Most Likely Outcome is typically higher than Historical due to how luxury spend is modeled.* "
-            "Luxury spending only occurs when stock returns exceed inflation. In historical mode, this is applied evenly; "
-            "in simulation, it's dynamically based on each month's return."
-        )      
+            f"Lifetimes sampled per path from the mortality tables: assets ran out before the last death in "
+            f"{outlived.mean():.0%} of paths. Median wealth at the last death: ${np.median(bequest)/1e6:,.1f}M. "
+            "Bands show households still living."
+        )
+
+    with st.expander("Sensitivity"):
+        st.caption("How much each input moves the outcome when lowered and raised, with every variant run "
+                   "against the same return paths in one batch.")
+        if st.button("Run sensitivity analysis"):
+            with st.spinner("Running sensitivity analysis..."):
+                base, sensitivity = sensitivity_report(rate_store, rate_stats,
+                                                       {k: st.session_state[k] for k in defaults}, today=today_date)
+            if len(sensitivity):
+                st.caption(f"Base case: success rate {base['success_rate']:.0%}, "
+                           f"median terminal value ${base['median']/1e6:,.1f}M")
+                st.pyplot(plot_tornado(base, sensitivity), use_container_width=True)
+                st.dataframe(sensitivity.round({"Success (low)": 2, "Success (high)": 2,
+                                                "Median (low)": 0, "Median (high)": 0}),
+                             use_container_width=True, hide_index=True)
+            else:
+                st.warning("Nothing to analyse: the horizon has already ended.")
+
+    with st.expander("Social Security claiming"):
+        st.caption("Tries every claiming month from 62 to 70 for both spouses against the same return paths. "
+                   "Benefits entered above are taken as the amounts at full retirement age and are reduced "
+                   "for early claims or increased for delayed ones.")
+        objective = st.radio("Optimize for", OBJECTIVES, horizontal=True)
+        if not (st.session_state.socsec_income_self or st.session_state.socsec_income_spouse):
+            st.info("Enter a Social Security benefit to compare claiming ages.")
+        elif st.button("Find best claiming ages"):
+            progress = st.progress(0.0, text="Evaluating claiming ages...")
+            claiming = optimize_claiming(rate_store, rate_stats, {k: st.session_state[k] for k in defaults},
+                                         objective, today=today_date,
+                                         progress=lambda done: progress.progress(done, text="Evaluating claiming ages..."))
+            progress.empty()
+            rows = [dict(claiming.describe(claiming.best), Choice="Best")]
+            if claiming.current is not None:
+                rows.append(dict(claiming.describe(claiming.current), Choice="Current"))
+            st.dataframe(pd.DataFrame(rows).set_index("Choice").round({"Success rate": 3, "Median terminal value": 0}),
+                         use_container_width=True)
+            st.caption(f"Evaluated {claiming.success.size:,} combinations.")
+            st.pyplot(plot_claiming(claiming), use_container_width=True)
 
 with tab2:
-    if st.session_state.rate_mode == "Simulation":
+    if st.session_state.rate_mode in SCENARIO_MODES and n_simulations and scenario_months:
+        with st.expander("Export scenarios"):
+            st.caption(f"Every path's monthly investment and cash (today's dollars), income and spend, for all "
+                       f"{n_simulations:,} scenarios. Simulated and written in blocks of paths.")
+            export_format = st.radio("Format", EXPORT_FORMATS, horizontal=True,
+                                     format_func=lambda f: {"npz": "NumPy (.npz)", "parquet": "Parquet"}[f])
+            export_precision = st.radio("Values", EXPORT_PRECISIONS, horizontal=True,
+                                        help="Float32 halves the file; whole dollars rounds to the nearest dollar")
+            size = export_bytes(n_simulations, scenario_months, export_precision)
+            if size > MAX_DOWNLOAD_BYTES:
+                st.info(f"About {size / 1e6:,.0f} MB, more than the {MAX_DOWNLOAD_BYTES / 1e6:,.0f} MB offered as a "
+                        f"download: choose Float32 or whole dollars, or fewer scenarios.")
+            elif st.button("Prepare export"):
+                progress = st.progress(0.0, text="Exporting scenarios...")
+                # Written to disk in blocks; the download reads the finished file once and it is then deleted
+                with tempfile.NamedTemporaryFile(suffix=f".{export_format}") as export_file:
+                    export_scenarios(export_file, scenario_plan, scenario_rates, export_format, export_precision,
+                                     policy=spending_policy(st.session_state), labels=scenario_labels,
+                                     progress=lambda done: progress.progress(done, text="Exporting scenarios..."))
+                    export_file.flush()
+                    progress.empty()
+                    with open(export_file.name, "rb") as finished:
+                        st.download_button("Download", finished, file_name=f"scenarios.{export_format}",
+                                           mime="application/octet-stream")
+    if st.session_state.rate_mode in SCENARIO_MODES:
         st.markdown("**Historical Average Returns (used in simulation baseline):**")
-    st.dataframe(results, use_container_width=True)
+    # Annual rollup by default; the full monthly table is only built on request
+    if st.toggle("Show monthly detail", key="show_monthly_detail"):
+        st.dataframe(results.monthly(), use_container_width=True, hide_index=True)
+    else:
+        st.dataframe(results.annual(), use_container_width=True, hide_index=True)
 
 with tab3:
     st.markdown("""
@@ -757,10 +1205,12 @@ with tab3:
         <h5>📈 Projecting Investment Growth</h5>
         <p>Your investments evolve monthly based on market conditions. We model this using:</p>
         <ul>
-        <li><b>Simulation Mode</b>: 100 different possible futures based on randomly sampled historical market performance</li>
+        <li><b>Simulation Mode</b>: Many possible futures (100 by default) based on randomly sampled historical market performance, with optional antithetic or stratified sampling for steadier results</li>
+        <li><b>Historical Sequences Mode</b>: Every actual starting year replayed in order, showing how the plan would have fared starting in 1929, 1966 or 2000</li>
         <li><b>User Input Mode</b>: Custom returns you specify for each asset class</li>
         <li><b>Historical Mode</b>: Long-term average returns from market history</li>
         </ul>
+        <p>The stock and bond returns can each be a fixed blend of any assets in the return data (for example 70% US and 30% international stocks), rebalanced monthly, over the years every chosen asset has data.</p>
         <p>All projections account for inflation, ensuring values reflect today's purchasing power.</p>
 
         <h5>💰 Tracking Your Cash Flow</h5>
@@ -776,8 +1226,15 @@ with tab3:
         <li><b>Spending Needs</b>
         <ul>
             <li>Essential monthly expenses</li>
-            <li>Optional luxury spending (activated only when markets perform well)</li>
+            <li>Optional luxury spending, set by the chosen policy: only when markets perform well (the default), adjusted by withdrawal-rate guardrails, a percentage of the portfolio, or a percentage kept between a floor and a ceiling</li>
             <li>Later-life assisted living costs</li>
+            <li>One-off or repeating events such as a home sale, tuition or a new car, optionally in today's dollars</li>
+        </ul>
+        </li>
+        <li><b>Lifetimes</b>
+        <ul>
+            <li>Everyone in the household, whether single, a couple or several generations, is modelled the same way</li>
+            <li>Income, contributions and costs stop for each person at their life expectancy, or, with stochastic longevity, at an age of death drawn for every scenario from a mortality table</li>
         </ul>
         </li>
         </ul>
@@ -788,7 +1245,9 @@ with tab3:
         <li>Depositing surplus income into cash reserves</li>
         <li>Drawing from cash first when expenses exceed income</li>
         <li>Transferring funds from investments when cash reserves fall below your target</li>
-        <li>Automatically adjusting your investment allocation at retirement</li>
+        <li>Following your stock allocation glide path: a step at retirement, a linear path, age in bonds, or your own curve</li>
+        <li>Rebalancing monthly, annually, or when the allocation drifts past a band, net of trading costs</li>
+        <li>Optionally, drawing from taxable, tax-deferred and Roth accounts in your chosen order, taking required minimum distributions and paying federal income and capital gains tax (2024 brackets for married couples filing jointly, indexed to inflation)</li>
         </ul>
 
         <h5>🧮 Inflation Adjustment</h5>
@@ -801,6 +1260,7 @@ with tab3:
         <li>Monthly income vs. spending patterns</li>
         <li>Age-triggered expenses like assisted living</li>
         <li>Clear indicators of financial sustainability</li>
+        <li>Optional stress tests: named historical crises (1929–32, 1973–74, 2000–02 then 2008, the inflationary 1940s and 1970s) and your own one-year shocks, replayed over the historical average</li>
         </ul>
 
         <div class="methodology-divider"></div>
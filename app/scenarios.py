@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import as_strided
+
+from engine import STOCKS
+from path_cache import path_cache
+
+RATE_MODES = ("User Input", "Historical", "Simulation", "Historical Sequences")
+SAMPLING_METHODS = ("Independent", "Antithetic", "Stratified")
+RETURN_MODELS = ("Historical resample", "Lognormal", "Student-t")
+
+
+# --- Resampling ---
+def year_ranks(monthly, lo=0, hi=None):
+    """Row indices of the window's years ordered from worst to best stock return."""
+    hi = len(monthly) if hi is None else hi
+    return lo + np.argsort(np.asarray(monthly[lo:hi, STOCKS]), kind="stable")
+
+
+def sample_year_indices(n_paths, months, lo, hi, method="Independent", rng=None, ranks=None):
+    """Historical row index for every path and month, drawn with the given method.
+
+    Antithetic pairs each path with a mirror path whose year ranks are reflected
+    (the k-th worst year becomes the k-th best). Stratified draws, for every month,
+    one year from each of n_paths equal slices of the ranked years, in random order.
+    Both keep the percentile estimates steadier than independent draws at the same count.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    n_years = hi - lo
+    if method == "Independent":
+        return rng.integers(lo, hi, size=(n_paths, months))
+    ranks = ranks if ranks is not None else np.arange(lo, hi)
+    if method == "Antithetic":
+        half = rng.integers(0, n_years, size=((n_paths + 1) // 2, months))
+        paired = np.stack([half, n_years - 1 - half], axis=1).reshape(-1, months)
+        return ranks[paired[:n_paths]]
+    if method == "Stratified":
+        strata = rng.permuted(np.tile(np.arange(n_paths), (months, 1)), axis=1).T
+        position = (strata + rng.random((n_paths, months))) / n_paths
+        return ranks[(position * n_years).astype(int)]
+    raise ValueError(f"Unknown sampling method: {method}")
+
+
+def sample_scenarios(monthly, n_paths, months, lo=0, hi=None, method="Independent", rng=None):
+    """Draw a historical year for every path and month, as a (n_paths, months, k) rate tensor."""
+    hi = len(monthly) if hi is None else hi
+    ranks = None if method == "Independent" else year_ranks(monthly, lo, hi)
+    return monthly[sample_year_indices(n_paths, months, lo, hi, method, rng, ranks)]
+
+
+# --- Parametric returns ---
+def parametric_scenarios(window, n_paths, months, model="Lognormal", method="Independent", rng=None,
+                         degrees_of_freedom=5):
+    """Correlated returns from a distribution fitted to a historical window.
+
+    log(1 + r) for stocks, bonds, cash and inflation is multivariate normal
+    ("Lognormal") or multivariate Student-t with the same covariance ("Student-t",
+    fatter tails), using the window's log mean and covariance (see RateStats). Each
+    month gets an independent annual draw converted to its monthly equivalent, as
+    with historical resampling. The whole (n_paths, months, 4) tensor comes from
+    one batched draw. Antithetic pairs each path with its mirrored shocks;
+    stratification has no parametric counterpart here and draws independently.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    k = len(window.log_mean)
+    # A little jitter keeps the factorisation stable for short, near-singular windows
+    chol = np.linalg.cholesky(window.log_cov + 1e-12 * np.eye(k))
+    n_draws = (n_paths + 1) // 2 if method == "Antithetic" else n_paths
+    # One flat (draws, k) product goes through BLAS; a 3-D matmul over tiny k does not
+    shocks = (rng.standard_normal((n_draws * months, k)) @ chol.T).reshape(n_draws, months, k)
+    if model == "Student-t":
+        scale = rng.chisquare(degrees_of_freedom, size=(n_draws, months, 1)) / (degrees_of_freedom - 2)
+        shocks /= np.sqrt(scale)
+    elif model != "Lognormal":
+        raise ValueError(f"Unknown return model: {model}")
+    if method == "Antithetic":
+        shocks = np.stack([shocks, -shocks], axis=1).reshape(-1, months, k)[:n_paths]
+    shocks += window.log_mean
+    shocks /= 12
+    return np.expm1(shocks, out=shocks)
+
+
+def convergence_report(terminal_values, draw, counts=(25, 50, 100, 200), methods=SAMPLING_METHODS,
+                       n_reps=16, seed=0):
+    """Standard error of the terminal p10/p50/p90 versus scenario count for each method.
+
+    draw(n_paths, method, rng) returns a rate tensor and terminal_values(rates) the
+    final value of each path. All replications of one (method, count) cell go through
+    the engine as a single batch.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for method in methods:
+        for n in counts:
+            rates = np.concatenate([draw(n, method, rng) for _ in range(n_reps)])
+            finals = terminal_values(rates).reshape(n_reps, n)
+            spread = np.std(np.percentile(finals, [10, 50, 90], axis=1), axis=1, ddof=1)
+            rows.append({"Method": method, "Scenarios": n,
+                         "SE p10": spread[0], "SE median": spread[1], "SE p90": spread[2]})
+    return pd.DataFrame(rows)
+
+
+# --- Profile-driven draws ---
+def draw_scenarios(store, stats, profile, n_paths, months, method="Independent", rng=None):
+    """Draw rates for a profile's return model and historical window."""
+    if profile["return_model"] == "Historical resample":
+        lo, hi = stats.indices(*profile["rate_window"])
+        return sample_scenarios(store.monthly, n_paths, months, lo, hi, method, rng)
+    return parametric_scenarios(stats.window(*profile["rate_window"]), n_paths, months,
+                                profile["return_model"], method, rng,
+                                degrees_of_freedom=profile["t_degrees_of_freedom"])
+
+
+def scenario_key(store, profile, months, n_paths, method):
+    """Cache key of the seeded draws draw_scenarios makes for a profile."""
+    model = profile["return_model"]
+    return ("sample_rates", store.checksum, tuple(profile["rate_window"]), model,
+            profile["t_degrees_of_freedom"] if model == "Student-t" else None,
+            method, profile["random_seed"], months, n_paths)
+
+
+def totals_key(store, profile_hash, today):
+    """Cache key of the scenario totals for a profile fingerprint on a given day."""
+    return ("scenario_totals", store.checksum, today.isoformat(), profile_hash)
+
+
+# --- Historical sequences ---
+def historical_sequences(monthly, months, lo=0, hi=None, wrap=True):
+    """Replay every starting year in [lo, hi) in order, one year of returns per 12 months.
+
+    Returns the row offsets of the starting years and a read-only (n_starts, months, k)
+    view. Each scenario is a strided window over one year-by-year series, so the
+    scenario tensor itself is never copied. With wrap, sequences that run past the
+    last year continue from the first; otherwise only complete sequences are kept.
+    """
+    hi = len(monthly) if hi is None else hi
+    series = np.repeat(np.asarray(monthly[lo:hi]), 12, axis=0)
+    n_years = hi - lo
+    if wrap:
+        n_starts = n_years
+        series = np.resize(series, (12 * (n_years - 1) + months, series.shape[1]))
+    else:
+        n_starts = max((len(series) - months) // 12 + 1, 0)
+    row, col = series.strides
+    windows = as_strided(series, shape=(n_starts, months, series.shape[1]),
+                         strides=(12 * row, row, col), writeable=False)
+    return lo + np.arange(n_starts), windows
+
+
+# --- Rates for a profile's mode ---
+def profile_rates(store, stats, profile, months):
+    """Rate paths for the profile's rate mode, as run_simulation would use them."""
+    mode = profile["rate_mode"]
+    if mode == "User Input":
+        annual = np.array([profile["return_stock"], profile["return_bond"],
+                           profile["return_cash"], profile["inflation"]]) / 100
+    elif mode == "Historical":
+        annual = stats.window(*profile["rate_window"]).geo_mean
+    elif mode == "Historical Sequences":
+        lo, hi = stats.indices(*profile["rate_window"])
+        return historical_sequences(store.monthly, months, lo, hi, wrap=profile["sequence_wrap"])[1]
+    else:
+        n_paths, method = profile["n_simulations"], profile["sampling_method"]
+        if not profile["common_random_numbers"]:
+            return draw_scenarios(store, stats, profile, n_paths, months, method)
+        # Seeded draws are shared with the app's sessions through the process-wide cache
+        return path_cache.get_or_compute(
+            scenario_key(store, profile, months, n_paths, method),
+            lambda: draw_scenarios(store, stats, profile, n_paths, months, method,
+                                   np.random.default_rng(profile["random_seed"])))
+    return np.broadcast_to((1 + annual) ** (1 / 12) - 1, (1, months, len(annual)))
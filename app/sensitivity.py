@@ -0,0 +1,124 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from engine import build_plan, horizon_months, month_dates, simulate, stack_plans
+from scenarios import profile_rates
+from spending import spending_policy
+
+# (label, inputs moved together, kind, step): "scale" multiplies by 1 +/- step,
+# "date" moves a date by +/- step years, "age" adds +/- step years and "points"
+# adds +/- step percentage points. Paired inputs are moved for both spouses at once.
+SENSITIVITY_INPUTS = (
+    ("Need spend", ("retire_need_spend",), "scale", 0.1),
+    ("Luxury spend", ("retire_luxury_spend",), "scale", 0.1),
+    ("Assisted living cost", ("retire_assisted",), "scale", 0.1),
+    ("Current investments", ("current_investment",), "scale", 0.1),
+    ("Current cash", ("current_cash",), "scale", 0.1),
+    ("Cash set point", ("cash_set_point",), "scale", 0.1),
+    ("Contributions", ("current_contribution_self", "current_contribution_spouse"), "scale", 0.1),
+    ("Pension income", ("retire_income_self", "retire_income_spouse"), "scale", 0.1),
+    ("Social Security income", ("socsec_income_self", "socsec_income_spouse"), "scale", 0.1),
+    ("Retirement date", ("retire_date_self", "retire_date_spouse"), "date", 1),
+    ("Pension start", ("pension_date_self", "pension_date_spouse"), "date", 1),
+    ("Social Security start", ("socsec_date_self", "socsec_date_spouse"), "date", 1),
+    ("Stock allocation pre-retirement", ("stock_allocation_pre_retirement",), "points", 10),
+    ("Stock allocation post-retirement", ("stock_allocation_post_retirement",), "points", 10),
+    ("Assisted living age", ("assisted_age_self", "assisted_age_spouse"), "age", 2),
+    ("Life expectancy", ("life_expectancy_self", "life_expectancy_spouse"), "age", 2),
+)
+
+
+def shift_years(date, years):
+    try:
+        return date.replace(year=date.year + years)
+    except ValueError:  # 29 February
+        return date.replace(year=date.year + years, day=28)
+
+
+def perturb(value, kind, step, direction):
+    if kind == "scale":
+        return value * (1 + direction * step)
+    if kind == "date":
+        return shift_years(value, direction * step)
+    if kind == "points":
+        return min(max(value + direction * step, 0), 100)
+    return value + direction * step
+
+
+def step_label(kind, step, direction):
+    sign = "+" if direction > 0 else "−"
+    if kind == "scale":
+        return f"{sign}{step:.0%}"
+    if kind == "points":
+        return f"{sign}{step} pts"
+    return f"{sign}{step} yr{'s' if step != 1 else ''}"
+
+
+def perturbations(profile, inputs=SENSITIVITY_INPUTS):
+    """(label, low variant, high variant, low text, high text) for every input the profile can move."""
+    for label, keys, kind, step in inputs:
+        variants = []
+        for direction in (-1, 1):
+            variant = dict(profile)
+            for key in keys:
+                variant[key] = perturb(profile[key], kind, step, direction)
+            variants.append(variant)
+        if all(variants[0][k] == profile[k] == variants[1][k] for k in keys):
+            continue  # e.g. scaling an income of zero
+        yield label, variants[0], variants[1], step_label(kind, step, -1), step_label(kind, step, 1)
+
+
+def sensitivity_report(store, stats, profile, inputs=SENSITIVITY_INPUTS, today=None, max_cells=2_000_000):
+    """Effect of moving each input down and up on success rate and median terminal value.
+
+    Every variant is run against the same rate paths (the base case's, extended to
+    the longest variant's horizon), stacked along a variant axis into a few large
+    simulate() calls, so the differences reflect the inputs alone and the cost is
+    a handful of batches rather than a rerun per variant. Returns the base-case metrics and one row per input, largest
+    effect on the median first.
+    """
+    today = today or datetime.date.today()
+    rows = list(perturbations(profile, inputs))
+    variants = [profile] + [v for row in rows for v in row[1:3]]
+    plans = [build_plan(v, month_dates(horizon_months(v, today), today)) for v in variants]
+    months = max(plan.months for plan in plans)
+    rates = np.asarray(profile_rates(store, stats, profile, plans[0].months))
+    if months > plans[0].months:
+        longer = profile_rates(store, stats, profile, months)
+        # Seeded draws depend on the horizon; keep the base case's, as shown on the page
+        # (without wrap-around, fewer historical sequences cover the longer horizon)
+        n_paths = min(len(rates), len(longer))
+        rates = np.concatenate([rates[:n_paths], longer[:n_paths, plans[0].months:]], axis=1)
+    n_paths = len(rates)
+    if months == 0 or n_paths == 0:
+        return {"success_rate": np.nan, "median": np.nan}, pd.DataFrame()
+
+    # Plans along a variant axis broadcast against one copy of the rates; blocks of
+    # variants and paths keep each simulate() call to about max_cells path-months
+    variant_step = max(max_cells // (n_paths * months), 1)
+    path_step = max(max_cells // (variant_step * months), 1)
+    finals = np.empty((len(plans), n_paths))
+    for v_lo in range(0, len(plans), variant_step):
+        block = plans[v_lo:v_lo + variant_step]
+        batch = stack_plans(block, months=months)
+        # Each variant ends at its own horizon
+        ends = np.array([max(plan.months - 1, 0) for plan in block])
+        for lo in range(0, n_paths, path_step):
+            hi = min(lo + path_step, n_paths)
+            totals = simulate(batch, rates[None, lo:hi], policy=spending_policy(profile)).total
+            finals[v_lo:v_lo + len(block), lo:hi] = totals[np.arange(len(block)), :, ends]
+    success = (finals > 0).mean(axis=1)
+    median = np.median(finals, axis=1)
+
+    report = pd.DataFrame([
+        {"Input": label, "Low": low_text, "High": high_text,
+         "Success (low)": success[1 + 2 * i], "Success (high)": success[2 + 2 * i],
+         "Median (low)": median[1 + 2 * i], "Median (high)": median[2 + 2 * i]}
+        for i, (label, _, _, low_text, high_text) in enumerate(rows)
+    ])
+    if len(report):
+        swing = (report["Median (high)"] - report["Median (low)"]).abs()
+        report = report.loc[swing.sort_values(ascending=False, kind="stable").index].reset_index(drop=True)
+    return {"success_rate": success[0], "median": median[0]}, report
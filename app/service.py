@@ -0,0 +1,329 @@
+"""Stateless HTTP API for the retirement model, on the same engine as the Streamlit app.
+
+POST /simulate takes a profile in the shape of the app's defaults (dates as ISO
+strings; omitted inputs keep their default) and returns summary statistics and
+yearly percentile bands of total savings in today's dollars. Requests that arrive
+within a few milliseconds of each other are padded to a common horizon and run
+through one batched simulate() call. GET /health reports batching counters.
+
+    python app/service.py --port 8081
+    curl -s localhost:8081/simulate -d '{"rate_mode": "Simulation", "retire_need_spend": 9000}'
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from allocation import GLIDE_PATHS, REBALANCING, parse_glide_points
+from engine import build_plan, horizon_months, month_dates, simulate, stack_plans
+from events import validate_events
+from household import MORTALITY_TABLES, validate_members
+from path_cache import preload
+from profiles import default_profile
+from rate_stats import get_rate_stats
+from rate_store import get_rate_store, mixed_store
+from scenarios import RATE_MODES, RETURN_MODELS, SAMPLING_METHODS, profile_rates
+from spending import SPENDING_POLICIES, policy_key, spending_policy
+from stress import validate_shocks
+from taxes import WITHDRAWAL_ORDERS
+
+PERCENTILES = (10, 25, 50, 75, 90)
+MAX_PATHS = 2000  # per request
+MAX_HORIZON_YEARS = 130  # from today to the last expected death
+MAX_BODY_BYTES = 1 << 20  # a profile is a few KB even with long event tables
+DEFAULT_PORT = int(os.environ.get("API_PORT", 8081))
+# Bounds of the sidebar's number inputs, (least, most) with None for open-ended
+INPUT_BOUNDS = {
+    "spending_rate": (0.5, 15.0),
+    "spending_floor": (0, 100),
+    "spending_ceiling": (100, 500),
+    "stock_allocation_pre_retirement": (0, 100),
+    "stock_allocation_post_retirement": (0, 100),
+    "age_in_bonds_base": (50, 150),
+    "rebalance_band": (1, 25),
+    "trading_cost": (0, 200),
+    "deferred_pct": (0, 100),
+    "roth_pct": (0, 100),
+    "taxable_gain_pct": (0, 100),
+    "capital_gains_rate": (0, 30),
+    "t_degrees_of_freedom": (3, 30),
+    "random_seed": (0, None),
+    "inflation": (0.1, 10.0),
+    "return_cash": (0.1, 10.0),
+    "return_stock": (0.1, 15.0),
+    "return_bond": (0.1, 15.0),
+}
+
+
+# --- Requests ---
+class Job:
+    """One request's plan and rate paths, waiting to join a batch."""
+
+    def __init__(self, profile, plan, rates):
+        self.profile = profile
+        self.plan = plan
+        self.rates = rates
+
+    @property
+    def n_paths(self):
+        return len(self.rates)
+
+    @property
+    def months(self):
+        return self.plan.months
+
+
+def parse_profile(payload, defaults):
+    """Defaults overlaid with the request's inputs; raises ValueError on anything invalid."""
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object")
+    unknown = sorted(set(payload) - set(defaults))
+    if unknown:
+        raise ValueError(f"Unknown inputs: {', '.join(unknown)}")
+    profile = dict(defaults)
+    for k, v in payload.items():
+        if isinstance(defaults[k], datetime.date):
+            v = datetime.date.fromisoformat(v)
+        elif isinstance(defaults[k], tuple):
+            v = tuple(v)
+        elif isinstance(defaults[k], bool):
+            if not isinstance(v, bool):
+                raise ValueError(f"{k} must be true or false")
+        elif isinstance(defaults[k], (int, float)):
+            if isinstance(v, bool) or not isinstance(v, (int, float)) or not math.isfinite(v):
+                raise ValueError(f"{k} must be a number")
+        elif isinstance(defaults[k], str):
+            if not isinstance(v, str):
+                raise ValueError(f"{k} must be a string")
+        profile[k] = v
+    for k, (least, most) in INPUT_BOUNDS.items():
+        if profile[k] < least or (most is not None and profile[k] > most):
+            raise ValueError(f"{k} must be between {least} and {most}" if most is not None
+                             else f"{k} must be at least {least}")
+    if profile["tax_aware"] and profile["deferred_pct"] + profile["roth_pct"] > 100:
+        raise ValueError("deferred_pct and roth_pct add up to more than 100")
+    if profile["rate_mode"] not in RATE_MODES:
+        raise ValueError(f"rate_mode must be one of {', '.join(RATE_MODES)}")
+    if profile["sampling_method"] not in SAMPLING_METHODS:
+        raise ValueError(f"sampling_method must be one of {', '.join(SAMPLING_METHODS)}")
+    if profile["return_model"] not in RETURN_MODELS:
+        raise ValueError(f"return_model must be one of {', '.join(RETURN_MODELS)}")
+    if profile["spending_policy"] not in SPENDING_POLICIES:
+        raise ValueError(f"spending_policy must be one of {', '.join(SPENDING_POLICIES)}")
+    if profile["glide_path"] not in GLIDE_PATHS:
+        raise ValueError(f"glide_path must be one of {', '.join(GLIDE_PATHS)}")
+    if profile["glide_path"] == "Custom":
+        parse_glide_points(str(profile["glide_custom"]))
+    if profile["rebalancing"] not in REBALANCING:
+        raise ValueError(f"rebalancing must be one of {', '.join(REBALANCING)}")
+    for person in ("self", "spouse"):
+        if profile[f"mortality_table_{person}"] not in MORTALITY_TABLES:
+            raise ValueError(f"mortality_table_{person} must be one of {', '.join(MORTALITY_TABLES)}")
+    profile["cash_events"] = validate_events(profile["cash_events"])
+    profile["other_members"] = validate_members(profile["other_members"])
+    profile["stress_shocks"] = validate_shocks(profile["stress_shocks"])
+    if profile["withdrawal_order"] not in WITHDRAWAL_ORDERS:
+        raise ValueError(f"withdrawal_order must be one of {', '.join(WITHDRAWAL_ORDERS)}")
+    if not 1 <= profile["n_simulations"] <= MAX_PATHS:
+        raise ValueError(f"n_simulations must be between 1 and {MAX_PATHS}")
+    if horizon_months(profile) > 12 * MAX_HORIZON_YEARS:
+        raise ValueError(f"The profile's horizon is longer than {MAX_HORIZON_YEARS} years")
+    return profile
+
+
+def summarize(job, totals):
+    """Summary statistics and yearly percentile bands for one request's path totals."""
+    final = totals[:, -1]
+    points = np.unique(np.r_[np.arange(0, job.months, 12), job.months - 1])
+    bands = np.percentile(totals[:, points], PERCENTILES, axis=0)
+    return {
+        "rate_mode": job.profile["rate_mode"],
+        "paths": job.n_paths,
+        "months": job.months,
+        "final": {
+            "mean": round(float(final.mean())),
+            **{f"p{q}": round(float(v)) for q, v in zip(PERCENTILES, np.percentile(final, PERCENTILES))},
+        },
+        "success_rate": float((final > 0).mean()),
+        "bands": {
+            "dates": [str(d) for d in job.plan.dates[points]],
+            **{f"p{q}": np.round(band).tolist() for q, band in zip(PERCENTILES, bands)},
+        },
+    }
+
+
+def simulate_jobs(jobs):
+    """Run a batch of requests through one simulate() call per spending policy and tax setting."""
+    results = [None] * len(jobs)
+    groups = {}
+    for n, job in enumerate(jobs):
+        tax_key = None if job.plan.tax is None else job.plan.tax.key
+        groups.setdefault((policy_key(job.profile), tax_key), []).append(n)
+    for members in groups.values():
+        group = [jobs[n] for n in members]
+        months = max(job.months for job in group)
+        repeats = [job.n_paths for job in group]
+        plan = stack_plans([job.plan for job in group], repeats, months)
+        # Padding months have zero returns and inflation, so balances just carry forward
+        rates = np.zeros((sum(repeats), months, 4))
+        offsets = np.r_[0, np.cumsum(repeats)]
+        for job, lo, hi in zip(group, offsets[:-1], offsets[1:]):
+            rates[lo:hi, :job.months] = job.rates
+        totals = simulate(plan, rates, policy=spending_policy(group[0].profile)).total
+        for n, job, lo, hi in zip(members, group, offsets[:-1], offsets[1:]):
+            results[n] = summarize(job, totals[lo:hi, :job.months])
+    return results
+
+
+# --- Micro-batching ---
+class MicroBatcher:
+    """Collects jobs submitted within `window` seconds of the first and runs them together.
+
+    A batch closes early once it holds max_paths paths. submit() blocks the calling
+    request thread until its batch has run.
+    """
+
+    def __init__(self, run, window=0.005, max_paths=20000):
+        self.run = run  # run(jobs) -> one result per job
+        self.window = window
+        self.max_paths = max_paths
+        self.batches = 0
+        self.jobs = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="micro-batch", daemon=True)
+        self._thread.start()
+
+    def submit(self, job):
+        future = Future()
+        self._queue.put((job, future))
+        return future.result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        paths = batch[0][0].n_paths
+        deadline = time.monotonic() + self.window
+        while paths < self.max_paths:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            paths += item[0].n_paths
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            self.batches += 1
+            self.jobs += len(batch)
+            try:
+                results = self.run([job for job, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+
+
+# --- HTTP ---
+class SimulationService:
+    """Shared state behind the request handlers: rate data, defaults and the batcher."""
+
+    def __init__(self, window=0.005, max_paths=20000):
+        self.store = get_rate_store()
+        self.stats = get_rate_stats(self.store)
+        preload()
+        self.defaults = default_profile(self.stats)
+        self.batcher = MicroBatcher(simulate_jobs, window, max_paths)
+
+    def simulate(self, payload):
+        profile = parse_profile(payload, self.defaults)
+        months = horizon_months(profile)
+        if months == 0:
+            raise ValueError("The profile's horizon has already ended")
+        store = mixed_store(self.store, profile)
+        rates = profile_rates(store, get_rate_stats(store), profile, months)
+        if len(rates) == 0:
+            raise ValueError("The horizon is longer than the selected window; enable sequence_wrap")
+        plan = build_plan(profile, month_dates(months))
+        return self.batcher.submit(Job(profile, plan, rates))
+
+
+class Handler(BaseHTTPRequestHandler):
+    service = None  # set by serve()
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status, body, close=False):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if close:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._reply(404, {"error": "Not found"})
+        batcher = self.service.batcher
+        self._reply(200, {"status": "ok", "batches": batcher.batches, "requests": batcher.jobs})
+
+    def do_POST(self):
+        if self.path != "/simulate":
+            return self._reply(404, {"error": "Not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length < 0:
+                raise ValueError("Content-Length must not be negative")
+            if length > MAX_BODY_BYTES:  # left unread, so the connection can't be reused
+                return self._reply(413, {"error": f"Request body is larger than {MAX_BODY_BYTES} bytes"}, close=True)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            result = self.service.simulate(payload)
+        except (ValueError, TypeError) as e:  # includes malformed JSON
+            return self._reply(400, {"error": str(e)})
+        except Exception as e:
+            return self._reply(500, {"error": str(e)})
+        self._reply(200, result)
+
+    def log_message(self, format, *args):
+        pass  # keep the benchmark quiet; put a proxy in front for access logs
+
+
+def serve(host="0.0.0.0", port=DEFAULT_PORT, window=0.005, max_paths=20000):
+    Handler.service = SimulationService(window, max_paths)
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    print(f"serving on http://{host}:{server.server_address[1]} (batch window {window * 1e3:g}ms)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--window-ms", type=float, default=5.0, help="how long a batch waits for more requests")
+    parser.add_argument("--max-batch-paths", type=int, default=20000, help="close a batch early at this many paths")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.window_ms / 1e3, args.max_batch_paths)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
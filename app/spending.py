@@ -0,0 +1,111 @@
+import numpy as np
+
+from engine import INFLATION, STOCKS
+
+SPENDING_POLICIES = ("Stocks beat inflation", "Guardrails", "Percent of portfolio", "Floor and ceiling")
+
+
+class SpendingPolicy:
+    """Decides each month's discretionary (luxury) spend for every path at once.
+
+    simulate() calls start() once, then discretionary() every month with that
+    month's index, each path's portfolio (investments plus cash, before the month's
+    flows) and that month's rates. Both work on whole arrays, so a policy costs a
+    few array operations per month however many paths there are. Policies that
+    carry state between months set stateful; use one instance per run.
+    """
+
+    stateful = False
+
+    def start(self, plan, portfolio):
+        pass
+
+    def discretionary(self, i, plan, portfolio, month_rates):
+        raise NotImplementedError
+
+
+class StocksBeatInflation(SpendingPolicy):
+    """The planned luxury spend, paid only in months where stocks beat inflation."""
+
+    def discretionary(self, i, plan, portfolio, month_rates):
+        return np.where(month_rates[..., STOCKS] > month_rates[..., INFLATION], plan.luxury_spend[..., i], 0)
+
+
+class Guardrails(SpendingPolicy):
+    """Guyton-Klinger style guardrails on the planned luxury spend.
+
+    Once a year the withdrawal rate (annualised need, care and luxury spend over the
+    portfolio) is compared with the starting rate: above it by more than `band`,
+    luxury spend is cut by `adjustment`; below it by more than `band`, it is raised
+    by the same fraction.
+    """
+
+    stateful = True
+
+    def __init__(self, band=0.2, adjustment=0.1):
+        self.band = band
+        self.adjustment = adjustment
+
+    def _rate(self, i, plan, portfolio, level):
+        spend = plan.need_spend[..., i] + plan.assisted_spend[..., i] + level * plan.luxury_spend[..., i]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(portfolio > 0, 12 * spend / portfolio, np.inf)
+
+    def start(self, plan, portfolio):
+        self.level = 1.0
+        self.initial_rate = self._rate(min(1, plan.months - 1), plan, portfolio, 1.0)
+
+    def discretionary(self, i, plan, portfolio, month_rates):
+        if i % 12 == 0:
+            rate = self._rate(i, plan, portfolio, self.level)
+            self.level = np.where(rate > self.initial_rate * (1 + self.band), self.level * (1 - self.adjustment),
+                                  np.where(rate < self.initial_rate * (1 - self.band),
+                                           self.level * (1 + self.adjustment), self.level))
+        return self.level * plan.luxury_spend[..., i]
+
+
+class PercentOfPortfolio(SpendingPolicy):
+    """Total spend of `rate` a year of the portfolio; need and care costs are always paid."""
+
+    def __init__(self, rate=0.04):
+        self.rate = rate
+
+    def discretionary(self, i, plan, portfolio, month_rates):
+        return np.maximum(self.rate / 12 * portfolio - plan.need_spend[..., i] - plan.assisted_spend[..., i], 0)
+
+
+class FloorAndCeiling(PercentOfPortfolio):
+    """Percent of portfolio, with luxury spend kept between floor and ceiling times the plan."""
+
+    def __init__(self, rate=0.04, floor=0.5, ceiling=1.5):
+        super().__init__(rate)
+        self.floor = floor
+        self.ceiling = ceiling
+
+    def discretionary(self, i, plan, portfolio, month_rates):
+        planned = plan.luxury_spend[..., i]
+        return np.clip(super().discretionary(i, plan, portfolio, month_rates),
+                       self.floor * planned, self.ceiling * planned)
+
+
+def spending_policy(profile):
+    """A fresh policy instance for the profile's spending settings."""
+    name = profile["spending_policy"]
+    if name == "Stocks beat inflation":
+        return StocksBeatInflation()
+    if name == "Guardrails":
+        return Guardrails()
+    if name == "Percent of portfolio":
+        return PercentOfPortfolio(profile["spending_rate"] / 100)
+    if name == "Floor and ceiling":
+        return FloorAndCeiling(profile["spending_rate"] / 100, profile["spending_floor"] / 100,
+                               profile["spending_ceiling"] / 100)
+    raise ValueError(f"Unknown spending policy: {name}")
+
+
+def policy_key(profile):
+    """The settings that define a profile's policy, for grouping profiles that can share a run."""
+    name = profile["spending_policy"]
+    if name in ("Percent of portfolio", "Floor and ceiling"):
+        return (name, profile["spending_rate"], profile["spending_floor"], profile["spending_ceiling"])
+    return (name,)
@@ -0,0 +1,103 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from engine import simulate
+from household import household
+from rate_store import RATE_COLUMNS
+
+# Named sequences of historical years, replayed in order from the stress start
+STRESS_SCENARIOS = (
+    ("1929–32 Depression", (1929, 1930, 1931, 1932)),
+    ("1973–74 stagflation", (1973, 1974)),
+    ("2000–02 then 2008", (2000, 2001, 2002, 2008)),
+    ("1940s inflation", tuple(range(1941, 1952))),
+    ("1970s inflation", tuple(range(1969, 1982))),
+)
+STRESS_STARTS = ("Retirement", "Today")
+# One row of the profile's stress_shocks list: an annual return (%) for one asset
+# in a given year after the stress start (0 = the first year)
+SHOCK_FIELDS = ("name", "asset", "return", "year")
+
+
+def stress_start_month(profile, dates):
+    """Month the stress years begin: the later retirement date (or today, if past or chosen)."""
+    if profile["stress_start"] == "Today" or len(dates) == 0:
+        return 0
+    return int(min(np.searchsorted(dates, household(profile).retirement), len(dates) - 1))
+
+
+def validate_shocks(shocks):
+    """Raises ValueError on a malformed user shock."""
+    if not isinstance(shocks, list):
+        raise ValueError("stress_shocks must be a list")
+    for shock in shocks:
+        if not isinstance(shock, dict) or sorted(shock) != sorted(SHOCK_FIELDS):
+            raise ValueError(f"Each stress shock needs exactly: {', '.join(SHOCK_FIELDS)}")
+        if shock["asset"] not in RATE_COLUMNS:
+            raise ValueError(f"Stress shock asset must be one of {', '.join(RATE_COLUMNS)}")
+        for field in ("return", "year"):
+            if isinstance(shock[field], bool) or not isinstance(shock[field], (int, float)):
+                raise ValueError(f"Stress shock {field} must be a number")
+        finite = math.isfinite(shock["return"]) and math.isfinite(shock["year"])
+        if not finite or shock["return"] <= -100 or shock["year"] < 0:
+            raise ValueError("Stress shocks need a return above -100% and a year of 0 or more")
+    return shocks
+
+
+def stress_rates(store, profile, baseline, dates):
+    """(names, descriptions, (n_scenarios, months, 4) rates) for the library and the profile's shocks.
+
+    Every scenario follows the baseline monthly rates except from the stress start,
+    where a library entry replays its historical years in order (each for 12 months)
+    and a user shock replaces one asset's return for one year. Years missing from
+    the rate table are skipped.
+    """
+    months = len(dates)
+    start = stress_start_month(profile, dates)
+    years = np.asarray(store.years)
+    library = []
+    for name, sequence in STRESS_SCENARIOS:
+        rows = [int(np.searchsorted(years, y)) for y in sequence if y in years]
+        if rows:
+            library.append((name, ", ".join(str(years[r]) for r in rows), rows))
+    shocks = profile["stress_shocks"]
+
+    rates = np.broadcast_to(np.asarray(baseline), (len(library) + len(shocks), months, len(RATE_COLUMNS))).copy()
+    for s, (_, _, rows) in enumerate(library):
+        replay = np.asarray(store.monthly)[np.repeat(rows, 12)][:max(months - start, 0)]
+        rates[s, start:start + len(replay)] = replay
+    for s, shock in enumerate(shocks, start=len(library)):
+        first = start + 12 * int(shock["year"])
+        rates[s, first:first + 12, RATE_COLUMNS.index(shock["asset"])] = (1 + shock["return"] / 100) ** (1 / 12) - 1
+
+    names = [name for name, _, _ in library]
+    descriptions = [years_text for _, years_text, _ in library]
+    for shock in shocks:
+        text = f"{shock['asset']} {shock['return']:+g}% in year {shock['year']:g}"
+        names.append(shock["name"] or text)
+        descriptions.append(text)
+    return names, descriptions, rates
+
+
+def stress_report(plan, store, profile, baseline, policy=None):
+    """Every stress scenario run through the plan in one batched simulate() call.
+
+    Returns the (n_scenarios, months) totals, in today's dollars, and a summary row
+    per scenario: final and lowest value and the date money runs out, if it does.
+    """
+    names, descriptions, rates = stress_rates(store, profile, baseline, plan.dates)
+    totals = simulate(plan, rates, policy=policy).total
+    if plan.months == 0:
+        return totals, pd.DataFrame()
+    depleted = totals <= 1  # within a dollar of nothing
+    runs_out = [str(plan.dates[row.argmax()]) if row.any() else "—" for row in depleted]
+    report = pd.DataFrame({
+        "Scenario": names,
+        "Stress years": descriptions,
+        "Final value": totals[:, -1].round(),
+        "Lowest value": totals.min(axis=1).round(),
+        "Money runs out": runs_out,
+    })
+    return totals, report
@@ -0,0 +1,94 @@
+"""Container warm-up, run before the Streamlit server starts (see Dockerfile).
+
+Compiles the rate store, imports and exercises every engine path once (including
+matplotlib's font cache), runs the default page, and precomputes the default
+profile's Simulation and Historical Sequences paths and results. Those are written to path_cache.WARM_DIR, where the server
+process memory-maps them into its shared cache on first import, so the first
+visitor after a deploy is served from cache. Finally writes the readiness marker
+checked by healthcheck.py.
+
+    python app/warmup.py
+"""
+import datetime
+import os
+import sys
+import time
+
+import numpy as np
+
+from engine import build_plan, horizon_months, month_dates, simulate, simulate_annual
+from path_cache import WARM_DIR, path_cache
+from profiles import default_profile, profile_fingerprint
+from rate_stats import get_rate_stats
+from rate_store import get_rate_store
+from scenarios import draw_scenarios, historical_sequences, scenario_key, totals_key
+from spending import spending_policy
+
+READY_FILE = os.path.join(WARM_DIR, "ready")
+
+
+def warm_default_profile(store, stats):
+    """Run the default page once and precompute its scenario modes; return the cache keys.
+
+    The default page (Historical mode) runs only the average-return path, which is
+    exercised here but not cached. The cache is filled for the modes a visitor
+    switches to: the Simulation draws and totals and the Historical Sequences
+    totals. Totals are keyed by day, so they serve visitors on the deploy day; after
+    that they are recomputed once per process (the draws stay valid until the
+    horizon, in months, changes).
+    """
+    defaults = default_profile(stats)
+    months = horizon_months(defaults)
+    plan = build_plan(defaults, month_dates(months))
+    today = datetime.date.today()
+    simulate(plan, np.broadcast_to(store.geo_mean_monthly, (1, months, 4)), policy=spending_policy(defaults))
+
+    profile = dict(defaults, rate_mode="Simulation")
+    n_paths, method = profile["n_simulations"], profile["sampling_method"]
+    rates_key = scenario_key(store, profile, months, n_paths, method)
+    rates = path_cache.get_or_compute(rates_key, lambda: draw_scenarios(
+        store, stats, profile, n_paths, months, method, np.random.default_rng(profile["random_seed"])))
+    keys = [rates_key]
+    sequences = historical_sequences(store.monthly, months, *stats.indices(*defaults["rate_window"]),
+                                     wrap=defaults["sequence_wrap"])[1]
+    for mode, mode_rates in (("Simulation", rates), ("Historical Sequences", sequences)):
+        profile = dict(defaults, rate_mode=mode)
+        key = totals_key(store, profile_fingerprint(profile, defaults), today)
+        path_cache.get_or_compute(key, lambda: simulate(plan, mode_rates, policy=spending_policy(profile)).total)
+        keys.append(key)
+
+    # Touch the remaining engine paths once so nothing is first-run at request time
+    simulate_annual(plan, rates)
+    for model in ("Lognormal", "Student-t"):
+        draw_scenarios(store, stats, dict(profile, return_model=model), 10, months)
+    return keys
+
+
+def warm_plotting():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt  # builds the font cache on a fresh container
+    fig, ax = plt.subplots(figsize=(12, 4))
+    ax.plot([0, 1], [0, 1], label="warm-up")
+    ax.legend()
+    fig.savefig(os.devnull, format="png")
+    plt.close(fig)
+
+
+def main():
+    start = time.perf_counter()
+    if os.path.exists(READY_FILE):
+        os.remove(READY_FILE)
+    store = get_rate_store()
+    stats = get_rate_stats(store)
+    keys = warm_default_profile(store, stats)
+    path_cache.save(WARM_DIR, keys)
+    warm_plotting()
+    with open(READY_FILE, "w") as f:
+        f.write(datetime.datetime.now().isoformat())
+    print(f"warm-up complete in {time.perf_counter() - start:.1f}s ({len(keys)} cache entries)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
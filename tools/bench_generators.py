@@ -0,0 +1,57 @@
+"""Benchmark scenario generation against the engine at large scenario counts.
+
+Times each return model / sampling method drawing the full (n_paths, months, 4)
+tensor for the default profile, next to one simulate() pass over the same
+tensor, so generation can be checked not to dominate.
+
+    python tools/bench_generators.py [n_paths ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from engine import build_plan, horizon_months, month_dates, simulate  # noqa: E402
+from profiles import DEFAULT_PROFILE  # noqa: E402
+from rate_stats import get_rate_stats  # noqa: E402
+from rate_store import get_rate_store  # noqa: E402
+from scenarios import parametric_scenarios, sample_scenarios  # noqa: E402
+
+
+def best_of(fn, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main(counts):
+    store = get_rate_store()
+    window = get_rate_stats(store).window()
+    months = horizon_months(DEFAULT_PROFILE)
+    plan = build_plan(DEFAULT_PROFILE, month_dates(months))
+    rng = np.random.default_rng(0)
+    generators = {
+        "resample / independent": lambda n: sample_scenarios(store.monthly, n, months, rng=rng),
+        "resample / antithetic": lambda n: sample_scenarios(store.monthly, n, months, method="Antithetic", rng=rng),
+        "resample / stratified": lambda n: sample_scenarios(store.monthly, n, months, method="Stratified", rng=rng),
+        "lognormal": lambda n: parametric_scenarios(window, n, months, "Lognormal", rng=rng),
+        "student-t": lambda n: parametric_scenarios(window, n, months, "Student-t", rng=rng),
+    }
+    print(f"{months} months per path")
+    print(f"{'paths':>7}  {'generator':24} {'generate':>9} {'simulate':>9} {'share':>6}")
+    for n in counts:
+        for name, generate in generators.items():
+            gen_time, rates = best_of(lambda: generate(n))
+            sim_time, _ = best_of(lambda: simulate(plan, rates), repeat=1)
+            share = gen_time / (gen_time + sim_time)
+            print(f"{n:7d}  {name:24} {gen_time * 1e3:7.1f}ms {sim_time * 1e3:7.1f}ms {share:6.1%}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [100, 1000, 10000])
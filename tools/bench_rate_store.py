@@ -0,0 +1,64 @@
+"""Benchmark compiling and loading a large monthly multi-asset return file.
+
+Writes a synthetic CSV of monthly returns (a Date column, the four engine columns
+and extra assets whose histories start at different years) to a scratch
+directory, then times the cold compile, a warm open of the compiled store, and
+deriving the engine tables for a blended asset mix. Also checks that the
+compiled annual returns match compounding the CSV's months directly.
+
+    python tools/bench_rate_store.py [n_months] [n_extra_assets]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from profiles import DEFAULT_PROFILE  # noqa: E402
+from rate_store import RATE_COLUMNS, RateStore, compile_rate_store, mixed_store  # noqa: E402
+
+
+def synthetic_csv(path, n_months, n_extra, rng):
+    dates = pd.period_range("1000-01", periods=n_months, freq="M").strftime("%Y-%m")
+    columns = RATE_COLUMNS + [f"Asset {i}" for i in range(n_extra)]
+    values = rng.normal(0.005, 0.03, (n_months, len(columns)))
+    for i in range(len(RATE_COLUMNS), len(columns)):
+        values[:rng.integers(0, n_months // 2), i] = np.nan  # later start of history
+    table = pd.DataFrame(values, columns=columns)
+    table.insert(0, "Date", dates)
+    table.to_csv(path, index=False)
+    return table
+
+
+def main(n_months=108_000, n_extra=8):
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as scratch:
+        csv_path = os.path.join(scratch, "returns.csv")
+        table = synthetic_csv(csv_path, n_months, n_extra, rng)
+        print(f"{n_months:,} months x {table.shape[1] - 1} assets, {os.path.getsize(csv_path) / 1e6:.0f} MB of CSV")
+
+        start = time.perf_counter()
+        path = compile_rate_store(csv_path, os.path.join(scratch, "store"))
+        print(f"cold compile  {time.perf_counter() - start:8.3f}s")
+        start = time.perf_counter()
+        store = RateStore(path)
+        print(f"warm open     {(time.perf_counter() - start) * 1e3:8.2f}ms  {len(store):,} complete years")
+
+        profile = dict(DEFAULT_PROFILE, stock_assets="Stocks: 60, Asset 0: 40", bond_assets="Bonds: 50, Asset 1: 50")
+        start = time.perf_counter()
+        mixed = mixed_store(store, profile)
+        print(f"asset mix     {(time.perf_counter() - start) * 1e3:8.2f}ms  {len(mixed):,} years in common")
+
+        years = table["Date"].str[:4].astype(int)
+        expected = (1 + table.drop(columns="Date")).groupby(years.to_numpy()).prod() - 1
+        error = np.nanmax(np.abs(np.asarray(store.assets) - expected.to_numpy()))
+        print(f"largest annual return difference {error:.2e}")
+        return 0 if error < 1e-9 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(n) for n in sys.argv[1:]]))
@@ -0,0 +1,127 @@
+"""Local throughput benchmark for the HTTP API (app/service.py).
+
+Starts the service in a subprocess for each batch window, then keeps `--clients`
+concurrent clients posting varied profiles for `--seconds`. Reports requests per
+second, latency percentiles, mean batch size and requests per second of server
+CPU time (throughput per core, independent of how many cores the host has).
+A window of 0 only batches requests that are already queued, for comparison.
+
+    python tools/bench_service.py --clients 16 --windows 0 5 --seconds 10
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SERVICE = os.path.join(ROOT, "app", "service.py")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")  # utime + stime
+
+
+def request(url, body=None):
+    data = None if body is None else json.dumps(body).encode()
+    with urllib.request.urlopen(url, data=data, timeout=120) as response:
+        return json.load(response)
+
+
+def profile_for(i, mode):
+    """A spread of profiles so batches mix horizons and spending levels."""
+    return {"rate_mode": mode, "retire_need_spend": 6000 + 250 * (i % 12),
+            "birthday_self": f"{1955 + i % 25}-06-01", "current_investment": 400000 + 50000 * (i % 10)}
+
+
+def run_window(window_ms, clients, seconds, mode):
+    port = free_port()
+    server = subprocess.Popen([sys.executable, SERVICE, "--host", "127.0.0.1", "--port", str(port),
+                               "--window-ms", str(window_ms)], stdout=subprocess.PIPE, cwd=ROOT)
+    try:
+        server.stdout.readline()  # "serving on ..."
+        url = f"http://127.0.0.1:{port}"
+        request(f"{url}/simulate", profile_for(0, mode))  # warm caches before timing
+        health = request(f"{url}/health")
+        cpu_start = server_cpu_seconds(server.pid)
+        deadline = time.perf_counter() + seconds
+        latencies, errors = [], []
+
+        def client(c):
+            i = c
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    request(f"{url}/simulate", profile_for(i, mode))
+                    latencies.append(time.perf_counter() - start)
+                except OSError as e:
+                    errors.append(str(e))
+                i += clients
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - start
+        cpu = server_cpu_seconds(server.pid) - cpu_start
+        after = request(f"{url}/health")
+    finally:
+        server.terminate()
+        server.wait()
+
+    n = len(latencies)
+    batches = after["batches"] - health["batches"]
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if n else (0, 0, 0)
+    return {
+        "window_ms": window_ms,
+        "requests": n,
+        "requests_per_s": n / wall,
+        "requests_per_cpu_s": n / cpu if cpu else float("nan"),
+        "p50_ms": p50 * 1e3,
+        "p95_ms": p95 * 1e3,
+        "p99_ms": p99 * 1e3,
+        "mean_batch": (after["requests"] - health["requests"]) / max(batches, 1),
+        "errors": errors[:5],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 5], help="batch windows to compare (ms)")
+    parser.add_argument("--seconds", type=float, default=10, help="duration of each run")
+    parser.add_argument("--mode", default="Simulation", help="rate_mode of the posted profiles")
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients, rate_mode={args.mode}, {os.cpu_count()} CPUs")
+    print(f"{'window':>7} {'req':>6} {'req/s':>7} {'req/cpu-s':>10} {'p50':>8} {'p95':>8} {'p99':>8} {'batch':>6}")
+    failed = False
+    for window in args.windows:
+        row = run_window(window, args.clients, args.seconds, args.mode)
+        print(f"{row['window_ms']:5g}ms {row['requests']:6d} {row['requests_per_s']:7.1f} "
+              f"{row['requests_per_cpu_s']:10.1f} {row['p50_ms']:6.0f}ms {row['p95_ms']:6.0f}ms "
+              f"{row['p99_ms']:6.0f}ms {row['mean_batch']:6.1f}")
+        for error in row["errors"]:
+            print(f"        error: {error}")
+        failed = failed or bool(row["errors"])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
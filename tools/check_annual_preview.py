@@ -0,0 +1,66 @@
+"""Check the annual-step preview engine against the monthly engine.
+
+Runs simulate() and simulate_annual() on the same scenarios for a set of profiles
+(default, an early retiree who runs out of money, and the longest horizon the
+inputs allow) and fails if any p10/median/p90 total, sampled at the preview's
+yearly points, differs by more than engine.ANNUAL_TOLERANCE of the starting balance.
+
+    python tools/check_annual_preview.py
+"""
+import datetime
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from engine import ANNUAL_TOLERANCE, build_plan, horizon_months, month_dates, simulate, simulate_annual  # noqa: E402
+from rate_store import get_rate_store  # noqa: E402
+from scenarios import sample_scenarios  # noqa: E402
+from profiles import DEFAULT_PROFILE  # noqa: E402
+
+D = datetime.date
+PROFILES = {
+    "default": DEFAULT_PROFILE,
+    "early retiree": dict(DEFAULT_PROFILE, birthday_self=D(1958, 5, 3), birthday_spouse=D(1962, 9, 9),
+                          retire_date_self=D(2020, 1, 1), retire_date_spouse=D(2029, 6, 1),
+                          socsec_date_self=D(2027, 3, 1), socsec_income_self=2500, life_expectancy_self=88,
+                          current_investment=600000, current_cash=10000, retire_need_spend=9000),
+    "longest horizon": dict(DEFAULT_PROFILE, birthday_self=datetime.date.today(), birthday_spouse=datetime.date.today(),
+                            life_expectancy_self=110, life_expectancy_spouse=110,
+                            retire_date_self=D(2090, 1, 1), retire_date_spouse=D(2090, 1, 1)),
+}
+
+
+def band_error(plan, rates, scale):
+    monthly = simulate(plan, rates)
+    annual = simulate_annual(plan, rates)
+    bands_monthly = np.percentile(monthly.total[:, annual.index], [10, 50, 90], axis=0)
+    bands_annual = np.percentile(annual.total, [10, 50, 90], axis=0)
+    return np.max(np.abs(bands_monthly - bands_annual)) / scale
+
+
+def main():
+    store = get_rate_store()
+    rng = np.random.default_rng(0)
+    failed = False
+    for name, profile in PROFILES.items():
+        months = horizon_months(profile)
+        plan = build_plan(profile, month_dates(months))
+        scale = profile["current_investment"] + profile["current_cash"]
+        checks = {
+            "historical average": np.broadcast_to(store.geo_mean_monthly, (1, months, 4)),
+            "simulation": sample_scenarios(store.monthly, 500, months, rng=rng),
+        }
+        for label, rates in checks.items():
+            error = band_error(plan, rates, scale)
+            ok = error <= ANNUAL_TOLERANCE
+            failed |= not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name:16} {label:19} {months:4d} months  max band error {error:.3%}")
+    print(f"tolerance {ANNUAL_TOLERANCE:.1%} of starting balance")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
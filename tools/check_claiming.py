@@ -0,0 +1,72 @@
+"""Check the claiming optimizer against direct simulate() runs.
+
+For a set of profiles (the default with benefits, a couple who have both
+already claimed, and one where only the spouse can still choose) checks that the
+optimizer's best grid cell, and the profile's own claiming dates when they are
+on the grid, give the same success rate and median terminal value as simulating
+that profile directly with those claiming dates and benefits.
+
+    python tools/check_claiming.py
+"""
+import datetime
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from claiming import optimize_claiming  # noqa: E402
+from engine import build_plan, horizon_months, month_dates, simulate  # noqa: E402
+from profiles import default_profile  # noqa: E402
+from rate_stats import get_rate_stats  # noqa: E402
+from rate_store import get_rate_store  # noqa: E402
+from scenarios import profile_rates  # noqa: E402
+from spending import spending_policy  # noqa: E402
+
+D = datetime.date
+PROFILES = {
+    "default": dict(socsec_income_self=2500, socsec_income_spouse=1500),
+    "both claimed": dict(birthday_self=D(1950, 5, 3), socsec_date_self=D(2017, 6, 1), socsec_income_self=2000,
+                         birthday_spouse=D(1951, 2, 9), socsec_date_spouse=D(2018, 3, 1), socsec_income_spouse=2000,
+                         retire_date_self=D(2015, 1, 1), retire_date_spouse=D(2016, 1, 1)),
+    "spouse open": dict(birthday_self=D(1950, 5, 3), socsec_date_self=D(2017, 6, 1), socsec_income_self=2000,
+                        retire_date_self=D(2015, 1, 1), birthday_spouse=D(1962, 9, 9),
+                        socsec_date_spouse=D(2029, 9, 1), socsec_income_spouse=1800),
+}
+
+
+def direct(store, stats, profile, result, cell):
+    """(success rate, median terminal value) of simulating one grid cell's claiming choice."""
+    i, j = cell
+    profile = dict(profile, socsec_date_self=result.dates_self[i], socsec_income_self=result.benefit_self[i],
+                   socsec_date_spouse=result.dates_spouse[j], socsec_income_spouse=result.benefit_spouse[j])
+    months = horizon_months(profile)
+    finals = simulate(build_plan(profile, month_dates(months)), profile_rates(store, stats, profile, months),
+                      policy=spending_policy(profile)).total[:, -1]
+    return (finals > 0).mean(), np.median(finals)
+
+
+def main():
+    store = get_rate_store()
+    stats = get_rate_stats(store)
+    failed = False
+    for name, inputs in PROFILES.items():
+        profile = dict(default_profile(stats), rate_mode="Simulation", n_simulations=200, **inputs)
+        result = optimize_claiming(store, stats, profile)
+        cells = {"best": result.best, "current": result.current}
+        for label, cell in cells.items():
+            if cell is None:
+                continue
+            success, median = direct(store, stats, profile, result, cell)
+            ok = (np.isclose(result.success[cell], success)
+                  and np.isclose(result.median[cell], median, rtol=1e-6, atol=1))
+            failed |= not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name:13} {label:8} grid {result.success.shape}  "
+                  f"median ${result.median[cell]:,.0f} vs direct ${median:,.0f}  "
+                  f"success {result.success[cell]:.1%} vs {success:.1%}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Check the float32 engine mode against float64.
+
+Runs simulate() and simulate_float32() on the same scenarios for a set of profiles
+(default, an early retiree who runs out of money, the longest horizon the inputs
+allow, tax-aware accounts, threshold rebalancing, and a guardrails policy with
+threshold rebalancing) and fails if, where simulate_float32() keeps float32 storage,
+any path's terminal value or any monthly p10/median/p90 total differs by more than
+engine.FLOAT32_ATOL dollars plus engine.FLOAT32_RTOL of the float64 value. A profile
+with balances beyond float32's range must fall back to float64 storage. Also
+reports the time and the memory of the stored results in each precision.
+
+    python tools/check_float32.py
+"""
+import datetime
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from engine import (FLOAT32_ATOL, FLOAT32_RTOL, build_plan, horizon_months, month_dates, simulate,  # noqa: E402
+                    simulate_float32)
+from profiles import DEFAULT_PROFILE  # noqa: E402
+from rate_store import get_rate_store  # noqa: E402
+from scenarios import sample_scenarios  # noqa: E402
+from spending import spending_policy  # noqa: E402
+
+D = datetime.date
+PROFILES = {
+    "default": DEFAULT_PROFILE,
+    "early retiree": dict(DEFAULT_PROFILE, birthday_self=D(1958, 5, 3), birthday_spouse=D(1962, 9, 9),
+                          retire_date_self=D(2020, 1, 1), retire_date_spouse=D(2029, 6, 1),
+                          socsec_date_self=D(2027, 3, 1), socsec_income_self=2500, life_expectancy_self=88,
+                          current_investment=600000, current_cash=10000, retire_need_spend=9000),
+    "longest horizon": dict(DEFAULT_PROFILE, birthday_self=datetime.date.today(), birthday_spouse=datetime.date.today(),
+                            life_expectancy_self=110, life_expectancy_spouse=110,
+                            retire_date_self=D(2090, 1, 1), retire_date_spouse=D(2090, 1, 1)),
+    "tax-aware": dict(DEFAULT_PROFILE, tax_aware=True, retire_need_spend=12000),
+    "threshold": dict(DEFAULT_PROFILE, rebalancing="Threshold", trading_cost=10),
+    "guardrails": dict(DEFAULT_PROFILE, spending_policy="Guardrails", rebalancing="Threshold", trading_cost=10),
+    "beyond float32": dict(DEFAULT_PROFILE, current_investment=1e39),
+}
+FALLBACK = {"beyond float32"}  # must be stored in float64
+
+
+def excess(approx, exact):
+    """Largest difference as a multiple of the allowed tolerance (ok when <= 1)."""
+    return np.max(np.abs(approx - exact) / (FLOAT32_ATOL + FLOAT32_RTOL * np.abs(exact)))
+
+
+def stored_mb(results):
+    return sum(values.nbytes for values in (results.investment, results.cash, results.spend, results.income)) / 1e6
+
+
+def main():
+    store = get_rate_store()
+    rng = np.random.default_rng(0)
+    failed = False
+    for name, profile in PROFILES.items():
+        months = horizon_months(profile)
+        plan = build_plan(profile, month_dates(months))
+        checks = {
+            "historical average": np.broadcast_to(store.geo_mean_monthly, (1, months, 4)),
+            "simulation": sample_scenarios(store.monthly, 2000, months, rng=rng),
+        }
+        for label, rates in checks.items():
+            start = time.perf_counter()
+            exact = simulate(plan, rates, policy=spending_policy(profile))
+            seconds64 = time.perf_counter() - start
+            start = time.perf_counter()
+            approx, used = simulate_float32(plan, rates, policy=spending_policy(profile))
+            seconds32 = time.perf_counter() - start
+
+            terminal = excess(approx.total[:, -1], exact.total[:, -1])
+            bands = excess(np.percentile(approx.total, [10, 50, 90], axis=0),
+                           np.percentile(exact.total, [10, 50, 90], axis=0))
+            if name in FALLBACK:
+                ok = used == "Float64"
+            else:
+                ok = used == "Float32" and max(terminal, bands) <= 1
+            failed |= not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name:16} {label:19} {months:4d} months  "
+                  f"terminal {terminal:.1e}x  bands {bands:.1e}x  of tolerance  "
+                  f"{seconds64:5.2f}s -> {seconds32:5.2f}s  {stored_mb(exact):6.1f} -> {stored_mb(approx):6.1f} MB  "
+                  f"runs as {used}")
+    print(f"tolerance ${FLOAT32_ATOL:,.0f} + {FLOAT32_RTOL:.0e} of the float64 value")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""Concurrent-session load test for the Streamlit app's rerun latency.
+
+Starts one `streamlit run app/retirement.py` server, with S3 replaced by the
+local filesystem stand-in (LOCAL_S3_DIR), and drives concurrent browser-like
+sessions against it over Streamlit's websocket protocol. Each session follows a
+scripted interaction sequence (switching rate modes, editing sidebar inputs,
+creating a profile, saving and loading it) and every rerun is timed from sending
+the widget change to the server reporting the script run finished.
+
+All sessions share the one server process, as they do in production, so the
+report is for that process: at each concurrency level it gives p50/p95/p99 rerun
+latency, reruns per second, the server's CPU seconds per rerun and its RSS.
+
+    python tools/load_test.py --levels 1 2 4 8 --iterations 2
+    python tools/load_test.py --json baseline.json    # keep for regression checks
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.sync.client import connect
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+APP = os.path.join(ROOT, "app", "retirement.py")
+
+
+class Session:
+    """One browser-like websocket session: keeps the widget values it has set and resends them each rerun."""
+
+    def __init__(self, url):
+        self.url = url
+        self.states = {}
+        self.widgets = {}
+
+    def widget(self, key):
+        return next(inner for id_, (_, inner) in self.widgets.items() if id_.endswith("-" + key))
+
+    def button(self, text):
+        return next(inner for kind, inner in self.widgets.values() if kind == "button" and text in inner.label)
+
+    def set(self, key, **value):
+        self.states[key] = WidgetState(id=self.widget(key).id, **value)
+
+    def bump(self, key, delta):
+        current = self.states.get(key)
+        value = current.double_value if current is not None else self.widget(key).default
+        self.set(key, double_value=value + delta)
+
+    def rerun(self, ws, trigger=None):
+        """Rerun the script with the current widget values; return any exceptions it showed."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        if trigger is not None:
+            msg.rerun_script.widget_states.widgets.append(WidgetState(id=trigger.id, trigger_value=True))
+        ws.send(msg.SerializeToString())
+        errors = []
+        while True:
+            fm = ForwardMsg()
+            fm.ParseFromString(ws.recv())
+            kind = fm.WhichOneof("type")
+            if kind == "delta" and fm.delta.WhichOneof("type") == "new_element":
+                element_type = fm.delta.new_element.WhichOneof("type")
+                inner = getattr(fm.delta.new_element, element_type)
+                if element_type == "exception":
+                    errors.append(inner.message)
+                elif getattr(inner, "id", ""):
+                    self.widgets[inner.id] = (element_type, inner)
+            elif kind == "script_finished" and fm.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return errors
+
+
+# Scripted interaction sequence: (step name, action on the Session returning a button to click or None)
+STEPS = [
+    ("open", lambda s: None),
+    ("rate_mode=Simulation", lambda s: s.set("rate_mode", string_value="Simulation")),
+    ("edit need spend", lambda s: s.bump("retire_need_spend", 1000)),
+    ("edit investment", lambda s: s.bump("current_investment", -10000)),
+    ("rate_mode=Historical Sequences", lambda s: s.set("rate_mode", string_value="Historical Sequences")),
+    ("type new password", lambda s: s.set("new_password", string_value="load-test")),
+    ("create profile", lambda s: s.button("Create New Profile")),
+    ("type password", lambda s: s.set("password", string_value="load-test")),
+    ("save", lambda s: s.button("Save Data")),
+    ("load", lambda s: s.button("Load Data")),
+    ("rate_mode=Historical", lambda s: s.set("rate_mode", string_value="Historical")),
+]
+
+
+def run_session(url, iterations, out):
+    """Client thread: run the scripted sequence `iterations` times, each in a fresh session."""
+    for _ in range(iterations):
+        session = Session(url)
+        with connect(url, subprotocols=["streamlit"], max_size=None, open_timeout=60) as ws:
+            for name, action in STEPS:
+                try:
+                    trigger = action(session)
+                except StopIteration:
+                    out["errors"].append(f"{name}: widget not found")
+                    continue
+                start = time.perf_counter()
+                errors = session.rerun(ws, trigger)
+                out["timings"].append((name, time.perf_counter() - start))
+                out["errors"].extend(f"{name}: {e}" for e in errors)
+
+
+# --- Server ---
+def free_port():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, s3_dir):
+    env = dict(os.environ, LOCAL_S3_DIR=s3_dir)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Streamlit server did not become healthy within 60s")
+
+
+def server_cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def server_rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_level(pid, url, concurrency, iterations):
+    outs = [{"timings": [], "errors": []} for _ in range(concurrency)]
+    threads = [threading.Thread(target=run_session, args=(url, iterations, out)) for out in outs]
+    rss = [server_rss_mb(pid)]
+    cpu_start = server_cpu_seconds(pid)
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        rss.append(server_rss_mb(pid))
+        time.sleep(0.1)
+    wall = time.perf_counter() - start
+    cpu = server_cpu_seconds(pid) - cpu_start
+    latencies = np.array([t for out in outs for _, t in out["timings"]])
+    by_step = {}
+    for out in outs:
+        for name, t in out["timings"]:
+            by_step.setdefault(name, []).append(t)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "concurrency": concurrency,
+        "reruns": len(latencies),
+        "p50_ms": p50 * 1e3,
+        "p95_ms": p95 * 1e3,
+        "p99_ms": p99 * 1e3,
+        "server_cpu_ms_per_rerun": cpu / len(latencies) * 1e3,
+        "reruns_per_s": len(latencies) / wall,
+        "server_rss_mb": rss[-1],
+        "server_peak_rss_mb": max(rss),
+        "step_p50_ms": {name: float(np.median(ts)) * 1e3 for name, ts in by_step.items()},
+        "errors": [e for out in outs for e in out["errors"]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8], help="concurrent sessions to test")
+    parser.add_argument("--iterations", type=int, default=2, help="scripted sequences per session")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = []
+    port = free_port()
+    url = f"ws://localhost:{port}/_stcore/stream"
+    with tempfile.TemporaryDirectory() as s3_dir:
+        server = start_server(port, s3_dir)
+        try:
+            print(f"{'sessions':>8} {'reruns':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'cpu/rerun':>10} "
+                  f"{'rerun/s':>8} {'server RSS':>11} {'peak':>8}")
+            for level in args.levels:
+                row = run_level(server.pid, url, level, args.iterations)
+                report.append(row)
+                print(f"{row['concurrency']:8d} {row['reruns']:7d} {row['p50_ms']:6.0f}ms {row['p95_ms']:6.0f}ms "
+                      f"{row['p99_ms']:6.0f}ms {row['server_cpu_ms_per_rerun']:8.0f}ms {row['reruns_per_s']:8.1f} "
+                      f"{row['server_rss_mb']:9.0f}MB {row['server_peak_rss_mb']:6.0f}MB")
+                for error in row["errors"][:5]:
+                    print(f"         error: {error}")
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print("\nmedian latency by step at the highest level:")
+    for name, ms in report[-1]["step_p50_ms"].items():
+        print(f"  {name:32} {ms:7.0f}ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if any(row["errors"] for row in report) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())